@@ -0,0 +1,228 @@
+# absa_cache.py
+# Content-addressed cache for parsed ATEPC results. Keys are a hash of the
+# normalized comment text plus the checkpoint name, so the same comment seen
+# on two videos (or on two requests) is only pushed through the model once.
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from aspect_batch import compact_rows, expand_rows
+from metrics import log_event
+from settings import (
+    ABSA_CACHE_SIZE,
+    ABSA_CACHE_TTL,
+    ABSA_CACHE_BACKEND,
+    ABSA_CACHE_SQLITE_PATH,
+    ABSA_CACHE_COLLECTION,
+)
+
+_ws = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalizes and collapses whitespace; case is kept since the model sees it."""
+    return _ws.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(text: str, checkpoint: str) -> str:
+    h = hashlib.sha256()
+    h.update(checkpoint.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(normalize_text(text).encode("utf-8"))
+    return h.hexdigest()
+
+
+class LRUTier:
+    """Thread-safe in-process LRU with an optional per-entry TTL."""
+
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteTier:
+    """Persistent tier backed by a local SQLite file."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS absa_cache (key TEXT PRIMARY KEY, items TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT items FROM absa_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value) -> None:
+        payload = json.dumps(value, default=float)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO absa_cache (key, items) VALUES (?, ?)",
+                (key, payload),
+            )
+            self._conn.commit()
+
+
+class MongoTier:
+    """Persistent tier stored in a MongoDB collection, shared by every worker."""
+
+    name = "mongo"
+
+    def __init__(self, collection: str):
+        self.collection = collection
+
+    def _coll(self):
+        from db_client import get_db
+        return get_db()[self.collection]
+
+    def get(self, key: str):
+        doc = self._coll().find_one({"_id": key}, {"items": 1})
+        return doc["items"] if doc else None
+
+    def set(self, key: str, value) -> None:
+        self._coll().replace_one({"_id": key}, {"_id": key, "items": value}, upsert=True)
+
+
+class ABSAResultCache:
+    """
+    Two-tier cache: an in-process LRU in front of an optional persistent store.
+    Entries are compact (aspect, sentiment, confidence) rows without the source
+    text, which is re-attached on read, so whitespace variants of a comment
+    share an entry but keep their own text.
+    """
+
+    def __init__(self, memory: LRUTier, persistent=None):
+        self.memory = memory
+        self.persistent = persistent
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "errors": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_rows(self, text: str, checkpoint: str) -> Optional[List[Tuple[Any, str, Any]]]:
+        """Cached (aspect, sentiment, confidence) rows for `text`, or None on a miss."""
+        key = cache_key(text, checkpoint)
+
+        rows = self.memory.get(key)
+        if rows is not None:
+            self._count("memory_hits")
+            return rows
+
+        if self.persistent is not None:
+            try:
+                rows = self.persistent.get(key)
+            except Exception as e:
+                log_event("absa_cache.read_failed", logging.WARNING, backend=self.persistent.name, error=str(e))
+                self._count("errors")
+                rows = None
+            if rows is not None:
+                # entries written before rows were compacted are lists of dicts
+                rows = [
+                    (r.get("aspect"), r.get("sentiment"), r.get("confidence")) if isinstance(r, dict)
+                    else tuple(r)
+                    for r in rows
+                ]
+                self.memory.set(key, rows)
+                self._count("persistent_hits")
+                return rows
+
+        self._count("misses")
+        return None
+
+    def get(self, text: str, checkpoint: str) -> Optional[List[Dict[str, Any]]]:
+        rows = self.get_rows(text, checkpoint)
+        return expand_rows(rows, text) if rows is not None else None
+
+    def set(self, text: str, checkpoint: str, items: List[Dict[str, Any]]) -> None:
+        self.set_rows(text, checkpoint, compact_rows(items))
+
+    def set_rows(self, text: str, checkpoint: str, rows: List[Tuple[Any, str, Any]]) -> None:
+        key = cache_key(text, checkpoint)
+        self.memory.set(key, rows)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(key, rows)
+            except Exception as e:
+                log_event("absa_cache.write_failed", logging.WARNING, backend=self.persistent.name, error=str(e))
+                self._count("errors")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats["memory_hits"] + stats["persistent_hits"]
+        lookups = hits + stats["misses"]
+        stats["hits"] = hits
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        stats["backend"] = self.persistent.name if self.persistent is not None else "memory"
+        return stats
+
+
+def _build_persistent_tier():
+    if ABSA_CACHE_BACKEND == "sqlite":
+        return SQLiteTier(ABSA_CACHE_SQLITE_PATH)
+    if ABSA_CACHE_BACKEND == "mongo":
+        return MongoTier(ABSA_CACHE_COLLECTION)
+    return None
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> ABSAResultCache:
+    """Process-wide cache configured from settings; built on first use."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = ABSAResultCache(
+                    LRUTier(ABSA_CACHE_SIZE, ABSA_CACHE_TTL),
+                    _build_persistent_tier(),
+                )
+    return _default_cache
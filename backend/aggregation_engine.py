@@ -0,0 +1,246 @@
+# aggregation_engine.py
+# One-pass replacement for running merge_aspects, aggregate_aspect_scores and
+# synthesize_category_scores back to back. Each analyzed row is visited once to
+# encode it (aspect id, sentiment codes, confidence); the per-aspect, global and
+# per-category statistics are then NumPy group-by reductions.
+#
+# Output is identical to the three original functions: np.add.at and cumsum
+# accumulate strictly in row order, so every float sum is bit-for-bit the same
+# as the sequential Python loops, and all rounding is done with Python's round.
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from aggregator import finalize_aggregate
+from aspect_batch import AspectBatch
+from aspect_normalize import get_canonical_table
+from metrics import timed
+from review_synthesizer import generate_humanized_review, map_aspect_category
+
+
+_get_aspect = itemgetter("aspect")
+_get_sentiment = itemgetter("sentiment")
+_get_confidence = itemgetter("confidence")
+
+
+class _Factorizer(dict):
+    """Maps each new key to the next integer id, in first-seen order."""
+
+    def __missing__(self, key):
+        value = self[key] = len(self)
+        return value
+
+
+def _sentiment_codes(sentiment: str) -> Tuple[int, int]:
+    """
+    (merge sign, aggregate sign) for one sentiment label. merge_aspects compares
+    the label exactly; aggregate_aspect_scores substring-matches it lowercased
+    and skips labels that are none of pos/neg/neu (aggregate sign 2 = skip).
+    """
+    if sentiment == "positive":
+        merge = 1
+    elif sentiment == "negative":
+        merge = -1
+    else:
+        merge = 0
+
+    s = sentiment.lower()
+    if "pos" in s:
+        agg = 1
+    elif "neg" in s:
+        agg = -1
+    elif "neu" in s:
+        agg = 0
+    else:
+        agg = 2
+    return merge, agg
+
+
+class AggregationEngine:
+    """
+    Accumulates analyzed rows with `add` (callable repeatedly, e.g. once per
+    inference batch) and produces the course payload pieces with `result`.
+    """
+
+    def __init__(self):
+        self._aspect_ids = _Factorizer()
+        self._aspects: List[Any] = []
+        self._sums = np.zeros(0, dtype=np.float64)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._total = 0.0
+        self._count = 0
+        self._codes: Dict[str, Tuple[int, int]] = {}
+        # aspect id -> canonical group id; groups are what merged_aspects reports.
+        # Grouping depends on every aspect's count, so it is redone when rows
+        # were added since the last call.
+        self._table = get_canonical_table()
+        self._groups_at = -1
+        self._groups = None
+
+    def add(self, items: Iterable[Dict[str, Any]]) -> np.ndarray:
+        """Folds rows in; returns the ids of the aspects they touched."""
+        items = items if isinstance(items, list) else list(items)
+        n = len(items)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        # every row is touched only by C-level map/itemgetter loops; Python code
+        # runs once per *new* aspect or sentiment label (_Factorizer.__missing__)
+        ids = np.fromiter(
+            map(self._aspect_ids.__getitem__, map(_get_aspect, items)), dtype=np.int64, count=n
+        )
+        labels = _Factorizer()
+        sid = np.fromiter(
+            map(labels.__getitem__, map(_get_sentiment, items)), dtype=np.int64, count=n
+        )
+        conf = np.fromiter(map(_get_confidence, items), dtype=np.float64, count=n)
+        if np.isnan(conf).any():
+            # fromiter turns None into NaN; None counts as 0.0, like merge_aspects
+            conf = np.fromiter((c or 0.0 for c in map(_get_confidence, items)), dtype=np.float64, count=n)
+
+        return self._fold(ids, list(labels), sid, conf)
+
+    def add_batch(self, batch: AspectBatch) -> np.ndarray:
+        """Folds a columnar AspectBatch in without building any row dicts."""
+        n = len(batch)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        ids = np.fromiter(map(self._aspect_ids.__getitem__, batch.aspects), dtype=np.int64, count=n)
+        sid = np.frombuffer(batch.sentiment_codes, dtype=np.uint8).astype(np.int64)
+        conf = np.frombuffer(batch.confidences, dtype=np.float64).copy()
+        conf[np.isnan(conf)] = 0.0   # missing confidence counts as 0.0, like merge_aspects
+        return self._fold(ids, batch.labels, sid, conf)
+
+    def _fold(self, ids: np.ndarray, labels: List[str], sid: np.ndarray, conf: np.ndarray) -> np.ndarray:
+        if len(self._aspect_ids) > len(self._aspects):
+            self._aspects = list(self._aspect_ids)
+
+        # sentiment labels -> (merge sign, aggregate sign) through a tiny lookup table
+        table = np.array(
+            [self._codes.setdefault(label, _sentiment_codes(label)) for label in labels],
+            dtype=np.int8,
+        )
+        merge_sign, agg_sign = table[sid, 0], table[sid, 1]
+
+        # per-aspect signed sums and counts
+        k = len(self._aspects)
+        if k > len(self._sums):
+            self._sums = np.concatenate([self._sums, np.zeros(k - len(self._sums))])
+            self._counts = np.concatenate([self._counts, np.zeros(k - len(self._counts), dtype=np.int64)])
+        np.add.at(self._sums, ids, merge_sign * conf)
+        chunk_counts = np.bincount(ids, minlength=k)
+        self._counts += chunk_counts
+
+        # global signed total over pos/neg/neu rows, summed in row order
+        counted = agg_sign != 2
+        values = (agg_sign[counted] * conf[counted]).astype(np.float64)
+        if len(values):
+            self._total = float(np.cumsum(np.concatenate(([self._total], values)))[-1])
+            self._count += int(len(values))
+
+        return np.flatnonzero(chunk_counts)
+
+    def _grouped(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Any]]:
+        """
+        Group id of every aspect id, the per-group signed sums and counts, and
+        each group's canonical aspect, all in first-seen order.
+        """
+        rows = int(self._counts.sum())
+        if self._groups_at != rows:
+            group_ids = _Factorizer()
+            canonical = self._table.assign(self._aspects, self._counts[:len(self._aspects)].tolist())
+            groups = np.fromiter(map(group_ids.__getitem__, canonical), dtype=np.int64, count=len(canonical))
+            k = len(group_ids)
+            # summed in aspect order, exactly like group_aspect_stats
+            sums = np.zeros(k, dtype=np.float64)
+            np.add.at(sums, groups, self._sums[:len(groups)])
+            counts = np.zeros(k, dtype=np.int64)
+            np.add.at(counts, groups, self._counts[:len(groups)])
+            self._groups = (groups, sums, counts, list(group_ids))
+            self._groups_at = rows
+        return self._groups
+
+    def merged_aspects(self, ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """
+        merge_aspects output, one row per canonical aspect, optionally
+        restricted to the groups of aspect `ids` (kept in first-seen order).
+        """
+        if self._table.mode == "off":
+            sums, counts, aspects = self._sums, self._counts, self._aspects
+        else:
+            groups, sums, counts, aspects = self._grouped()
+            if ids is not None:
+                ids = dict.fromkeys(int(groups[i]) for i in ids)
+        if ids is None:
+            ids = range(len(aspects))
+        avgs = sums / np.maximum(counts, 1)
+        merged = []
+        for idx in ids:
+            avg = float(avgs[idx])
+            if avg > 0:
+                final_sentiment = "positive"
+            elif avg < 0:
+                final_sentiment = "negative"
+            else:
+                final_sentiment = "neutral"
+            merged.append({
+                "aspect": aspects[idx],
+                "sentiment": final_sentiment,
+                "confidence": round(abs(avg), 4)
+            })
+        return merged
+
+    def category_scores(self, merged: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+        """synthesize_category_scores over the merged aspects, as one grouped sum."""
+        cat_ids: Dict[str, int] = {}
+        rows, signed = [], []
+        for item in merged:
+            if not item["aspect"]:
+                continue
+            category = map_aspect_category(item["aspect"])
+            if category == "misc":
+                continue
+            rows.append(cat_ids.setdefault(category, len(cat_ids)))
+            sentiment = item["sentiment"]
+            if sentiment == "positive":
+                signed.append(item["confidence"])
+            elif sentiment == "negative":
+                signed.append(-item["confidence"])
+            else:
+                signed.append(0.0)
+
+        if not rows:
+            return {}
+        rows_arr = np.asarray(rows, dtype=np.int64)
+        sums = np.zeros(len(cat_ids), dtype=np.float64)
+        np.add.at(sums, rows_arr, np.asarray(signed, dtype=np.float64))
+        counts = np.bincount(rows_arr, minlength=len(cat_ids))
+
+        return {
+            cat: {"score": round(float(sums[i]) / int(counts[i]), 3), "count": int(counts[i])}
+            for cat, i in cat_ids.items()
+        }
+
+    def aggregate(self) -> Dict[str, Any]:
+        return finalize_aggregate(self._total, self._count)
+
+    def result(self) -> Dict[str, Any]:
+        """aspect_list / review / aggregate, exactly as the three original passes build them."""
+        with timed("merge", items=len(self._sums)):
+            aspect_list = self.merged_aspects()
+        with timed("synthesize"):
+            categories = self.category_scores(aspect_list)
+            review = {
+                "summary": generate_humanized_review(categories),
+                "categories": categories,
+            }
+        with timed("aggregate"):
+            aggregate = self.aggregate()
+        return {"aspect_list": aspect_list, "review": review, "aggregate": aggregate}
+
+
+def fused_aggregate(items: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    engine = AggregationEngine()
+    engine.add(items)
+    return engine.result()
@@ -1,36 +1,28 @@
 import math
-from collections import defaultdict
 
-def aggregate_aspect_scores(analyzed_items):
+def accumulate_aggregate(state, analyzed_items):
     """
-    Weighted aggregate sentiment that accounts for both confidence
-    and number of comments (trust grows with sqrt of comment count).
+    Folds analyzed items into a running {"total_score", "count"} state.
+    Only positive / negative / neutral items count towards the aggregate.
     """
-    if not analyzed_items:
-        return {
-            "aggregate_score": 0.0,
-            "scaled_score": 0.0,
-            "adjusted_score": 0.0,
-            "overall_sentiment": "neutral",
-            "total_comments": 0
-        }
-
-    total_score = 0.0
-    count = 0
-
     for it in analyzed_items:
         sentiment = it.get('sentiment', '').lower()
         confidence = float(it.get('confidence', 0.0))
 
         if 'pos' in sentiment:
-            total_score += confidence
-            count += 1
+            state["total_score"] += confidence
+            state["count"] += 1
         elif 'neg' in sentiment:
-            total_score -= confidence
-            count += 1
+            state["total_score"] -= confidence
+            state["count"] += 1
         elif 'neu' in sentiment:
-            count += 1
+            state["count"] += 1
+
+    return state
+
 
+def finalize_aggregate(total_score, count):
+    """Builds the aggregate payload from a running signed total and count."""
     if count == 0:
         return {
             "aggregate_score": 0.0,
@@ -67,3 +59,12 @@ def aggregate_aspect_scores(analyzed_items):
         "total_comments": count,
         "damping_factor": round(damping_factor, 3)
     }
+
+
+def aggregate_aspect_scores(analyzed_items):
+    """
+    Weighted aggregate sentiment that accounts for both confidence
+    and number of comments (trust grows with sqrt of comment count).
+    """
+    state = accumulate_aggregate({"total_score": 0.0, "count": 0}, analyzed_items or [])
+    return finalize_aggregate(state["total_score"], state["count"])
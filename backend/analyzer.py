@@ -1,26 +1,65 @@
 # analyzer.py
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
+import logging
+import multiprocessing
 import threading
+import time
 
-# Use the ATEPC manager for aspect extraction + polarity classification
-from pyabsa import ATEPCCheckpointManager
+# pyabsa (and with it torch / transformers) is imported inside _load_model, so
+# importing this module - and starting the Flask app - stays fast
+from settings import (
+    ABSA_BATCH_SIZE, ABSA_SORT_BY_LENGTH, INFERENCE_WORKERS, INFERENCE_TORCH_THREADS, ABSA_PREPROCESS,
+    INFERENCE_BACKEND, INFERENCE_READY_TIMEOUT, PREFILTER_STRICTNESS, PREPROCESS_WINDOW_TOKENS,
+    PREPROCESS_MAX_TOKENS,
+)
+from absa_cache import get_default_cache
+from inference_pool import InferencePool
+from inference_backends import load_extractor
+from aspect_batch import AspectBatch, expand_rows
+from atepc_parser import Row, parse_rows, parse_batch_rows
+from text_preprocess import PreprocessStats, preprocess_comments
+from prefilter import LEVELS as PREFILTER_LEVELS, PrefilterStats, prefilter_mask
+from metrics import timed, log_event
 
-_sentiment_map = {
-    "positive": "positive",
-    "negative": "negative",
-    "neutral":  "neutral",
-    "pos": "positive",
-    "neg": "negative",
-    "neu": "neutral"
-}
+
+_WARMUP_TEXT = "The teacher explains every topic clearly and the slides are great."
 
 
 class ABSAService:
     _classifier = None
     _lock = threading.Lock()
+    # load state reported by /healthz and /readyz
+    _state = "not_loaded"           # not_loaded | loading | ready | failed
+    _load_seconds: Optional[float] = None
+    _warmup_seconds: Optional[float] = None
+    _load_error: Optional[str] = None
+    _backend: Optional[str] = None
+    # comment/window/token counts across every preprocessed request
+    preprocess_totals = PreprocessStats()
+    # comments the pre-filter sent to the model vs routed around it
+    prefilter_totals = PrefilterStats()
 
-    def __init__(self, checkpoint: str = "multilingual"):
+    def __init__(self, checkpoint: str = "multilingual", cache=None, use_cache: bool = True,
+                 preprocess: Optional[bool] = None, backend: Optional[str] = None,
+                 prefilter: Optional[str] = None):
         self.checkpoint = checkpoint
+        self.backend = backend or INFERENCE_BACKEND
+        self.prefilter = prefilter or PREFILTER_STRICTNESS
+        if self.prefilter not in PREFILTER_LEVELS:
+            raise ValueError(f"Unknown pre-filter strictness {self.prefilter!r}; expected one of {PREFILTER_LEVELS}")
+        # per-text model output is cached under model_tag, so switching to a
+        # quantized/ONNX backend never serves fp32 results as its own (or back)
+        self.model_tag = checkpoint if self.backend == "pyabsa" else f"{checkpoint}+{self.backend}"
+        self.preprocess = ABSA_PREPROCESS if preprocess is None else preprocess
+        # stored analyses, course stats and cached responses also depend on how
+        # comments were cut into windows and which ones the pre-filter skipped
+        self.result_tag = self.model_tag
+        if self.preprocess:
+            self.result_tag += f"/preprocess={PREPROCESS_WINDOW_TOKENS},{PREPROCESS_MAX_TOKENS}"
+        if self.prefilter != "off":
+            self.result_tag += f"/prefilter={self.prefilter}"
+        # results are cached per (normalized text, model_tag); pass use_cache=False to bypass
+        self.cache = (cache or get_default_cache()) if use_cache else None
 
     def _load_model(self):
         if ABSAService._classifier is not None:
@@ -29,117 +68,111 @@ class ABSAService:
         with ABSAService._lock:
             if ABSAService._classifier is not None:
                 return
-            ABSAService._classifier = ATEPCCheckpointManager.get_aspect_extractor(
-                self.checkpoint
-            )
+            ABSAService._state = "loading"
+            started = time.perf_counter()
+            try:
+                if INFERENCE_WORKERS > 0:
+                    if multiprocessing.parent_process() is not None:
+                        # a pool worker re-importing the app must never spawn its own pool
+                        raise RuntimeError("Refusing to start an inference pool inside a worker process.")
+                    # each worker process loads its own copy of the checkpoint; not
+                    # ready until every one of them has
+                    pool = InferencePool(self.checkpoint, INFERENCE_WORKERS, INFERENCE_TORCH_THREADS, self.backend)
+                    try:
+                        pool.wait_ready(INFERENCE_READY_TIMEOUT)
+                    except Exception:
+                        pool.shutdown(wait=False)
+                        raise
+                    ABSAService._classifier = pool
+                    # workers raise rather than fall back, so this is what they run
+                    ABSAService._backend = self.backend
+                else:
+                    # ATEPC manager for aspect extraction + polarity classification,
+                    # optionally quantized or served through ONNX Runtime
+                    ABSAService._classifier, ABSAService._backend = load_extractor(
+                        self.checkpoint, self.backend
+                    )
+            except Exception as e:
+                ABSAService._state = "failed"
+                ABSAService._load_error = str(e)
+                raise
+            ABSAService._load_seconds = round(time.perf_counter() - started, 3)
+            ABSAService._load_error = None
+            ABSAService._state = "ready"
 
-    def _normalize_sentiment(self, s: Any) -> str:
-        if not s:
-            return "neutral"
-        if isinstance(s, str):
-            return _sentiment_map.get(s.lower(), s.lower())
-        return str(s).lower()
+    def warm_up(self) -> None:
+        """Loads the checkpoint and runs one dummy inference so the first request is fast."""
+        self._load_model()
+        started = time.perf_counter()
+        self._extract_chunk([_WARMUP_TEXT], cache=False)
+        ABSAService._warmup_seconds = round(time.perf_counter() - started, 3)
 
-    def _parse_atepc_result(self, raw_result: Any, source_text: Optional[str] = None) -> List[Dict[str, Any]]:
-        items: List[Dict[str, Any]] = []
-
-        if raw_result is None:
-            return items
-
-        # Case: list → flatten
-        if isinstance(raw_result, list):
-            for elem in raw_result:
-                items.extend(self._parse_atepc_result(elem, source_text))
-            return items
-
-        # Case: string → treat as sentiment only
-        if isinstance(raw_result, str):
-            items.append({
-                "aspect": None,
-                "sentiment": self._normalize_sentiment(raw_result),
-                "polarity": self._normalize_sentiment(raw_result),
-                "confidence": None,
-                "_source_text": source_text
-            })
-            return items
-
-        # ============================
-        # Case: dict (ATEPC normal)
-        # ============================
-        if isinstance(raw_result, dict):
-            aspects = (
-                raw_result.get("aspect")
-                or raw_result.get("aspect_term")
-                or raw_result.get("extracted_aspect")
-                or []
-            )
-            sentiments = (
-                raw_result.get("sentiment")
-                or raw_result.get("polarity")
-                or raw_result.get("sentiment_pred")
-                or []
-            )
+    def start_warmup(self) -> threading.Thread:
+        def run():
+            try:
+                self.warm_up()
+                log_event("model.ready", backend=ABSAService._backend, load_seconds=ABSAService._load_seconds,
+                          warmup_seconds=ABSAService._warmup_seconds)
+            except Exception as e:
+                log_event("model.warmup_failed", logging.ERROR, error=str(e))
 
-            # NEW: get confidence
-            confidences = (
-                raw_result.get("confidence")
-                or raw_result.get("sentiment_confidence")
-                or []
-            )
+        thread = threading.Thread(target=run, name="absa-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        return cls._state == "ready"
+
+    @classmethod
+    def load_status(cls) -> Dict[str, Any]:
+        status = {
+            "state": cls._state,
+            "load_seconds": cls._load_seconds,
+            "warmup_seconds": cls._warmup_seconds,
+        }
+        if cls._load_error:
+            status["error"] = cls._load_error
+        return status
+
+    @classmethod
+    def health(cls) -> Dict[str, Any]:
+        clf = cls._classifier
+        if clf is None:
+            return {"status": "not_loaded"}
+        if isinstance(clf, InferencePool):
+            return {"mode": "pool", **clf.health()}
+        return {"mode": "in_process", "status": "ok", "backend": cls._backend}
 
-            # Normalize formats
-            if isinstance(aspects, str):
-                aspects = [aspects]
-            if isinstance(sentiments, str):
-                sentiments = [sentiments]
-            if isinstance(confidences, (int, float)):
-                confidences = [confidences]
-
-            # Zip aspects + sentiments (+ optional confidence)
-            if isinstance(aspects, list) and isinstance(sentiments, list) and len(aspects) == len(sentiments):
-                for i, (a, s) in enumerate(zip(aspects, sentiments)):
-                    conf = confidences[i] if i < len(confidences) else None
-
-                    items.append({
-                        "aspect": a.lower() if a else None,
-                        "sentiment": self._normalize_sentiment(s),
-                        "polarity": self._normalize_sentiment(s),
-                        "confidence": conf,        # <-- ADDED
-                        "_source_text": source_text
-                    })
-                return items
-
-            # Only aspects known
-            if isinstance(aspects, list) and len(aspects) > 0:
-                for a in aspects:
-                    items.append({
-                        "aspect": a.lower() if a else None,
-                        "sentiment": "neutral",
-                        "polarity": "neutral",
-                        "confidence": None,
-                        "_source_text": source_text
-                    })
-                return items
-
-            # Only sentiment known
-            if isinstance(sentiments, list) and len(sentiments) > 0:
-                for s in sentiments:
-                    items.append({
-                        "aspect": None,
-                        "sentiment": self._normalize_sentiment(s),
-                        "polarity": self._normalize_sentiment(s),
-                        "confidence": None,
-                        "_source_text": source_text
-                    })
-                return items
-
-        # fallback
-        return items
+    @classmethod
+    def shutdown(cls) -> None:
+        """Stops the worker pool, if any; the next request reloads the model."""
+        with cls._lock:
+            clf, cls._classifier = cls._classifier, None
+            cls._state = "not_loaded"
+        if isinstance(clf, InferencePool):
+            clf.shutdown(wait=True)
+
+    def _parse_atepc_result(self, raw_result: Any, source_text: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Parsed-item dicts for one raw result; see atepc_parser for the accepted shapes."""
+        return expand_rows(parse_rows(raw_result), source_text)
 
     def analyze_text(self, text: str) -> List[Dict[str, Any]]:
+        if self.preprocess:
+            return self.analyze_batch([text])[0]
+        if not prefilter_mask([text], self.prefilter, ABSAService.prefilter_totals)[0]:
+            return []
+        return expand_rows(self._analyze_raw(text), text)
+
+    def _analyze_raw(self, text: str) -> List[Row]:
         if not text:
             return []
 
+        if self.cache is not None:
+            cached = self.cache.get_rows(text, self.model_tag)
+            if cached is not None:
+                return cached
+
         self._load_model()
 
         try:
@@ -151,15 +184,168 @@ class ABSAService:
         except Exception as e:
             raise RuntimeError(f"ATEPC extract_aspect failed: {e}")
 
-        parsed = self._parse_atepc_result(raw, source_text=text)
+        rows = parse_rows(raw)
+        if self.cache is not None:
+            self.cache.set_rows(text, self.model_tag, rows)
+        return rows
+
+    def _extract_chunk(self, chunk: List[str], cache: bool = True) -> List[List[Row]]:
+        """Runs one forward pass over `chunk` and parses each result into rows."""
+        try:
+            raw = ABSAService._classifier.extract_aspect(
+                inference_source=chunk,
+                pred_sentiment=True,
+                save_result=False
+            )
+        except Exception as e:
+            raise RuntimeError(f"ATEPC extract_aspect failed: {e}")
+
+        # extract_aspect returns one result per input, in input order. If the
+        # shape is anything else we can't attribute results, so redo per text.
+        if not isinstance(raw, list) or len(raw) != len(chunk):
+            return [self._analyze_raw(t) for t in chunk]
+
+        parsed = parse_batch_rows(raw)
+        if cache and self.cache is not None:
+            for t, rows in zip(chunk, parsed):
+                self.cache.set_rows(t, self.model_tag, rows)
         return parsed
 
-    def analyze_batch(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
-        results = []
-        for t in texts:
-            results.append(self.analyze_text(t))
+    def analyze_batch(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        sort_by_length: Optional[bool] = None,
+        on_batch: Optional[Callable[[int, int], None]] = None,
+        preprocess: Optional[bool] = None,
+        stats: Optional[PreprocessStats] = None,
+        prefilter: Optional[str] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Analyzes `texts` in batches of `batch_size` per extract_aspect call.
+        With `preprocess`, comments are cleaned, contentless ones dropped and
+        long ones split into sentence windows whose aspects are merged back per
+        comment; counts go to `stats` and to the process-wide totals.
+        Comments the pre-filter skips (strictness `prefilter`, default the
+        service's) come back with no items, like contentless ones.
+        """
+        rows = self._batch_rows(texts, batch_size, sort_by_length, on_batch, preprocess, stats, prefilter)
+        return [expand_rows(r, t) for r, t in zip(rows, texts)]
+
+    def analyze_batch_rows(self, texts: List[str], **kwargs) -> List[List[Row]]:
+        """analyze_batch as (aspect, sentiment, confidence) rows, for callers that never need the dicts."""
+        return self._batch_rows(texts, **kwargs)
+
+    def analyze_batch_compact(self, texts: List[str], **kwargs) -> AspectBatch:
+        """analyze_batch, packed into a columnar AspectBatch (one text entry per input)."""
+        batch = AspectBatch()
+        for text, rows in zip(texts, self._batch_rows(texts, **kwargs)):
+            batch.extend_rows(text, rows)
+        return batch
+
+    def _batch_rows(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        sort_by_length: Optional[bool] = None,
+        on_batch: Optional[Callable[[int, int], None]] = None,
+        preprocess: Optional[bool] = None,
+        stats: Optional[PreprocessStats] = None,
+        prefilter: Optional[str] = None,
+    ) -> List[List[Row]]:
+        if preprocess is None:
+            preprocess = self.preprocess
+        level = prefilter or self.prefilter
+        if not preprocess:
+            if level != "off":
+                keep = prefilter_mask(texts, level, ABSAService.prefilter_totals)
+                texts = [t if k else "" for t, k in zip(texts, keep)]
+            return self._analyze_texts(texts, batch_size, sort_by_length, on_batch)
+
+        local = PreprocessStats()
+        windows = preprocess_comments(texts, local)
+        if level != "off":
+            keep = prefilter_mask([" ".join(ws) for ws in windows], level, ABSAService.prefilter_totals)
+            windows = [ws if k else [] for ws, k in zip(windows, keep)]
+            local.add(prefiltered=keep.count(False))
+        ABSAService.preprocess_totals.merge(local)
+        if stats is not None:
+            stats.merge(local)
+
+        flat = [w for ws in windows for w in ws]
+        parsed = self._analyze_texts(flat, batch_size, sort_by_length, on_batch)
+
+        results: List[List[Row]] = []
+        pos = 0
+        for ws in windows:
+            if len(ws) == 1:
+                results.append(parsed[pos])
+            else:
+                results.append([row for rows in parsed[pos:pos + len(ws)] for row in rows])
+            pos += len(ws)
         return results
 
+    def _analyze_texts(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        sort_by_length: Optional[bool] = None,
+        on_batch: Optional[Callable[[int, int], None]] = None,
+    ) -> List[List[Row]]:
+        """
+        Sends `texts` to the model as-is. With `sort_by_length`, texts of
+        similar length are batched together to cut padding; results are always
+        returned in the original order. `on_batch(done, total)` is called after
+        each model batch.
+        """
+        batch_size = batch_size or ABSA_BATCH_SIZE
+        if sort_by_length is None:
+            sort_by_length = ABSA_SORT_BY_LENGTH
+
+        results: List[List[Row]] = [[] for _ in texts]
+
+        # empty texts yield [] exactly like analyze_text; cached texts are
+        # answered directly and only the first copy of each miss goes to the model
+        order = []
+        duplicates: Dict[str, List[int]] = {}
+        for i, t in enumerate(texts):
+            if not t:
+                continue
+            if t in duplicates:
+                duplicates[t].append(i)
+                continue
+            if self.cache is not None:
+                cached = self.cache.get_rows(t, self.model_tag)
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            duplicates[t] = []
+            order.append(i)
+        if not order:
+            return results
+        if sort_by_length:
+            order.sort(key=lambda i: len(texts[i]))
+
+        self._load_model()
+
+        # a worker pool shards each call across its processes, so feed it one
+        # batch per worker at a time
+        if isinstance(ABSAService._classifier, InferencePool):
+            batch_size *= ABSAService._classifier.workers
+
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            with timed("inference", items=len(idx)):
+                parsed = self._extract_chunk([texts[i] for i in idx])
+            for i, rows in zip(idx, parsed):
+                # rows are immutable tuples, so duplicates can share them
+                results[i] = rows
+                for j in duplicates[texts[i]]:
+                    results[j] = rows
+            if on_batch is not None:
+                on_batch(min(start + batch_size, len(order)), len(order))
+
+        return results
 
 if __name__ == "__main__":
     svc = ABSAService()
@@ -1,23 +1,126 @@
 # app.py
-from flask import Flask, request, jsonify
+# Run with `python app.py`, or under a WSGI server through the factory, e.g.
+# gunicorn "app:create_app()", so services and the model warm-up start when
+# the server starts rather than on its first request.
+from flask import Flask, Response, request, jsonify, stream_with_context, g
 from flask_cors import CORS
-from db_client import insert_review, get_reviews, close_db, clear_reviews_on_exit
+from db_client import (
+    iter_review_batches,
+    count_reviews,
+    close_db,
+    clear_reviews_on_exit,
+    ensure_indexes,
+    get_review_version,
+    get_review_versions,
+)
 from analyzer import ABSAService
-from datetime import datetime
-from aspect_merge import merge_aspects
-from aggregator import aggregate_aspect_scores
-from youtube_transcript_api import YouTubeTranscriptApi
-from collector import fetch_and_store_comments
+from aggregation_engine import AggregationEngine
+from collector import fetch_and_store_comments, extract_video_id
+from bulk_collector import collect_many
+from transcripts import build_transcript_client, ingest_transcript, cached_transcript_analysis
 from config import MAX_COMMENTS
 from review_synthesizer import synthesize_review
+from settings import (
+    ANALYZE_ON_INGEST,
+    INCREMENTAL_ANALYSIS,
+    ABSA_BATCH_SIZE,
+    MAX_ANALYSIS_REVIEWS,
+    REVIEW_READ_BATCH,
+    MODEL_WARMUP,
+    BULK_COLLECT_MAX_VIDEOS,
+    COMPARE_MAX_COURSES,
+    SERVER_TIMING,
+    LOG_LEVEL,
+)
+from ingest_analysis import analyze_reviews_compact
+from jobs import get_job_manager
+from text_preprocess import PreprocessStats
+from course_stats import refresh_course_stats
+from course_compare import compare_courses, category_table
+from response_cache import build_response_cache, response_key
+from aspect_normalize import get_canonical_table
+from metrics import (
+    REGISTRY,
+    HTTP_SECONDS,
+    timed,
+    timed_iter,
+    start_request_timings,
+    request_timings,
+    server_timing_header,
+    render_samples,
+    log_event,
+)
 
-import re
+import time
 import atexit
+import threading
+import logging
+
+logging.basicConfig(level=LOG_LEVEL, format="%(message)s")
 
 app = Flask(__name__)
 CORS(app)
 
-absa = ABSAService()
+# Services are built by create_app(), not at import: spawned inference
+# workers re-import this module and must not start a model, pool or jobs.
+absa = None
+jobs = None
+responses = None
+# captions come through this client (YouTube, or fixture files offline)
+transcript_client = None
+
+_started_at = None
+_create_lock = threading.Lock()
+
+
+def create_app(warmup=None):
+    """
+    Builds the services the routes use (once per process) and returns the app.
+    `warmup` (default MODEL_WARMUP) starts loading the model in the background.
+    """
+    global absa, jobs, responses, transcript_client, _started_at
+    if warmup is None:
+        warmup = MODEL_WARMUP
+    with _create_lock:
+        if absa is not None:
+            return app
+        _started_at = time.time()
+        jobs = get_job_manager()
+        responses = build_response_cache()
+        transcript_client = build_transcript_client()
+        try:
+            ensure_indexes()
+        except Exception as e:
+            log_event("mongo.indexes_failed", logging.WARNING, error=str(e))
+
+        absa = ABSAService()
+        # the model loads in the background; collection endpoints serve right away
+        if warmup:
+            absa.start_warmup()
+    return app
+
+
+@app.before_request
+def _ensure_services():
+    # WSGI servers that import `app` directly build the services on first use
+    if absa is None:
+        create_app()
+
+
+@app.before_request
+def _start_timing():
+    g.started = time.perf_counter()
+    start_request_timings()
+
+
+@app.after_request
+def _finish_timing(response):
+    elapsed = time.perf_counter() - g.started
+    HTTP_SECONDS.observe(elapsed, endpoint=request.endpoint or "unknown",
+                         method=request.method, status=response.status_code)
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing_header(request_timings() or [], elapsed)
+    return response
 
 
 # responsible for collecting youtube reviews and inserting into database
@@ -27,68 +130,158 @@ def collect_youtube_comments():
     data = request.json or {}
     url = data.get("url")
     max_results = int(data.get("max_results", MAX_COMMENTS))
+    analyze = data.get("analyze", ANALYZE_ON_INGEST)
 
     if not url:
         return jsonify({"error": "YouTube URL is required"}), 400
 
     try:
-        video_id, count = fetch_and_store_comments(url, max_results=max_results)
+        video_id, count = fetch_and_store_comments(
+            url, max_results=max_results, analyze=analyze, absa=absa
+        )
 
         return jsonify({
             "status": "ok",
             "message": f"Fetched and stored {count} comments.",
             "video_id": video_id,
-            "count": count
+            "count": count,
+            **_queued_analysis(video_id, analyze),
         }), 200
 
     except Exception as e:
-        print(f"[ERROR] {e}")
+        log_event("collect.failed", logging.ERROR, url=url, error=str(e))
         return jsonify({"error": str(e)}), 500
 
 
-# responsible for running analysis and returning generated data to frontend as a response
-@app.route("/course/<course_id>/analysis", methods=["GET"])
-def course_analysis(course_id):
-    print(">>> course_id received:", course_id)
-    reviews = get_reviews("reviews", {"course_id": course_id}, limit=100)
-    print(">>> reviews fetched:", len(reviews))
-    if reviews:
-        print(">>> sample review:", reviews[0])
+def _queued_analysis(video_id, analyze):
+    """{"analysis_job": id} of the background analysis a collection queued, if any."""
+    job = jobs.latest("analyze", video_id) if analyze == "background" else None
+    return {"analysis_job": job.id} if job is not None else {}
+
+
+def _bulk_request():
+    """Validated (videos, max_results, analyze) from a bulk collection body, or an error string."""
+    data = request.json or {}
+    videos = data.get("videos") or data.get("urls")
+    if not isinstance(videos, list) or not videos:
+        return None, "A non-empty list of YouTube URLs or video ids is required"
+    if len(videos) > BULK_COLLECT_MAX_VIDEOS:
+        return None, f"At most {BULK_COLLECT_MAX_VIDEOS} videos per request"
+    if "analyze" in data:
+        analyze = data["analyze"] or None
     else:
-        print(">>> NO reviews found")
+        # bulk collection can't analyze inline; an inline default queues it instead
+        analyze = "background" if ANALYZE_ON_INGEST else None
+    if analyze not in (None, "background"):
+        return None, f"Bulk collection supports analyze=null or 'background', not {analyze!r}"
+    return (videos, int(data.get("max_results", MAX_COMMENTS)), analyze), None
 
-    raw_texts = [r.get("text") for r in reviews]
-    if not reviews:
-        print(">>> NO reviews found")
-        return jsonify({
+
+# collects many videos (e.g. a playlist) concurrently; per-video counts and errors
+@app.route("/collect/youtube/bulk", methods=["POST"])
+def collect_youtube_bulk():
+    args, error = _bulk_request()
+    if error:
+        return jsonify({"error": error}), 400
+    videos, max_results, analyze = args
+
+    try:
+        summary = collect_many(videos, max_results=max_results, analyze=analyze, absa=absa)
+        return jsonify({"status": "ok", **summary}), 200
+    except Exception as e:
+        log_event("collect_bulk.failed", logging.ERROR, videos=len(videos), error=str(e))
+        return jsonify({"error": str(e)}), 500
+
+
+def _transcript_request():
+    """Validated (url, languages, refresh) from a transcript collection body, or an error string."""
+    data = request.json or {}
+    url = data.get("url")
+    if not url or not extract_video_id(url):
+        return None, "Valid YouTube URL is required"
+    languages = data.get("languages")
+    if languages is not None and not (isinstance(languages, list) and all(isinstance(lang, str) for lang in languages)):
+        return None, "languages must be a list of language codes"
+    return (url, languages, bool(data.get("refresh", False))), None
+
+
+# analyzes the video's own content (its captions), stored per video id
+@app.route("/collect/youtube/transcript", methods=["POST"])
+def collect_youtube_transcript():
+    args, error = _transcript_request()
+    if error:
+        return jsonify({"error": error}), 400
+    url, languages, refresh = args
+
+    try:
+        payload = ingest_transcript(url, absa, client=transcript_client, languages=languages, refresh=refresh)
+        return jsonify({"status": "ok", **payload}), 200
+    except Exception as e:
+        log_event("transcript.failed", logging.ERROR, url=url, error=str(e))
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/course/<course_id>/transcript/analysis", methods=["GET"])
+def transcript_analysis(course_id):
+    languages = request.args.get("languages")
+    payload = cached_transcript_analysis(course_id, absa, languages.split(",") if languages else None)
+    if payload is None:
+        return jsonify({"error": "Transcript not collected yet; POST /collect/youtube/transcript"}), 404
+    return jsonify(payload), 200
+
+
+def _flag(name, default):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def _limit_arg():
+    """(?limit= or MAX_ANALYSIS_REVIEWS, error); 0 means no cap."""
+    limit = request.args.get("limit", MAX_ANALYSIS_REVIEWS, type=int)
+    if limit is not None and limit < 0:
+        return None, "limit must be 0 (no cap) or a positive number"
+    return limit, None
+
+
+def build_incremental_analysis(course_id, job=None):
+    """
+    Same payload as build_course_analysis, but built from the course's running
+    stats; only reviews added since the last refresh go through the model.
+    """
+    report = job.report if job is not None else (lambda **kw: None)
+
+    report(stage="inference")
+    stats = refresh_course_stats(
+        absa, course_id,
+        on_batch=lambda done, total: report(analyzed=done, to_analyze=total),
+    )
+    if stats.raw_count == 0:
+        report(stage="done")
+        return {
             "course_id": course_id,
             "raw_count": 0,
             "detailed": [],
             "aspect_list": []
-        }), 200
-    
-    batched_results = absa.analyze_batch(raw_texts)
-
-    # Destructure (flatten) the nested lists
-    all_analysis = []
-    for batch in batched_results:
-        all_analysis.extend(batch)
+        }
 
-    print(f">>> Flattened {len(all_analysis)} total aspect entries")
+    report(stage="aggregate")
+    with timed("merge"):
+        aspect_list = stats.merged_aspects()
+    with timed("synthesize"):
+        review_object = synthesize_review(aspect_list)
+    with timed("aggregate"):
+        aggregate_object = stats.aggregate_scores()
 
-    # Merge same aspects across reviews
-    aspect_list = merge_aspects(all_analysis)
+    report(stage="done")
+    return _analysis_payload(course_id, stats.raw_count, aspect_list, review_object, aggregate_object)
 
-    # Get categorised review
-    review_object = synthesize_review(aspect_list)
 
-    # Calculate all aggregates
-    aggregate_object = aggregate_aspect_scores(all_analysis)
-
-    # Respond cleanly
-    return jsonify({
+def _analysis_payload(course_id, raw_count, aspect_list, review_object, aggregate_object):
+    return {
         "course_id": course_id,
-        "raw_count": len(raw_texts),
+        "raw_count": raw_count,
         "aggregate": {
             "aggregate_score": aggregate_object.get("aggregate_score", 0.0),
             "scaled_score": aggregate_object.get("scaled_score", 0.0),
@@ -100,11 +293,390 @@ def course_analysis(course_id):
             "categories": review_object.get("categories", {}),
         },
         "aspect_list": aspect_list,
+    }
+
+
+def build_course_analysis(course_id, job=None, incremental=False, limit=MAX_ANALYSIS_REVIEWS):
+    """
+    Runs the full analysis pipeline for `course_id` and returns the response
+    payload. When run as a background job, progress is reported on `job`.
+    """
+    if incremental:
+        return build_incremental_analysis(course_id, job=job)
+
+    report = job.report if job is not None else (lambda **kw: None)
+
+    log_event("analysis.start", course_id=course_id, limit=limit)
+    report(stage="inference")
+    payload = None
+    for event in iter_course_analysis(course_id, limit=limit, batch_size=REVIEW_READ_BATCH, detail=False):
+        if event["event"] == "start":
+            log_event("analysis.reviews", course_id=course_id, reviews=event["raw_count"])
+            report(reviews=event["raw_count"])
+        elif event["event"] == "progress":
+            report(analyzed=event["analyzed"], to_analyze=event["total"])
+        else:
+            payload = event["payload"]
+
+    report(stage="done")
+    return payload
+
+
+# responsible for running analysis and returning generated data to frontend as a response
+@app.route("/course/<course_id>/analysis", methods=["GET"])
+def course_analysis(course_id):
+    incremental = _flag("incremental", INCREMENTAL_ANALYSIS)
+    limit, error = _limit_arg()
+    if error:
+        return jsonify({"error": error}), 400
+    return _cached_json_response(
+        lambda: response_key(course_id, get_review_version(course_id), absa.result_tag,
+                             incremental=incremental, limit=None if incremental else limit,
+                             aspects=get_canonical_table().tag),
+        lambda: build_course_analysis(course_id, incremental=incremental, limit=limit),
+    )
+
+
+def _cached_json_response(make_key, build):
+    """
+    Serves build() as JSON through the response cache. The key is fixed by the
+    review-set version, so it doubles as the ETag and a matching If-None-Match
+    is answered before anything is built.
+    """
+    if responses is None:
+        payload = build()
+        with timed("serialize"):
+            response = jsonify(payload)
+        return response, 200
+
+    key = make_key()
+    if key in request.if_none_match:
+        responses.count("not_modified")
+        response = Response(status=304)
+        response.set_etag(key)
+        return response
+
+    body = responses.get(key)
+    if body is None:
+        payload = build()
+        with timed("serialize"):
+            body = app.json.dumps(payload)
+        responses.set(key, body)
+
+    response = Response(body + "\n", mimetype="application/json")
+    response.set_etag(key)
+    return response, 200
+
+
+def iter_course_analysis(course_id, limit=MAX_ANALYSIS_REVIEWS, batch_size=ABSA_BATCH_SIZE, detail=True):
+    """
+    Yields progress events while analyzing `course_id` batch by batch, then a
+    final "result" event whose payload matches /course/<course_id>/analysis.
+    Reviews are streamed from a batched cursor and folded into running stats,
+    so memory stays flat however many reviews a course has. `limit` of None
+    or 0 analyzes every stored review.
+    """
+    q = {"course_id": course_id}
+    total = count_reviews("reviews", q, limit=limit)
+    yield {"event": "start", "course_id": course_id, "raw_count": total}
+
+    engine = AggregationEngine()
+    analyzed_count = 0
+    prep = PreprocessStats()
+
+    for chunk in timed_iter(iter_review_batches("reviews", q, batch_size=batch_size, limit=limit), "fetch"):
+        # reviews analyzed at ingest time are read back as-is; only the rest hit
+        # the model, and their results are stored when ingest analysis is enabled
+        analyzed = analyze_reviews_compact(absa, chunk, persist=bool(ANALYZE_ON_INGEST), stats=prep)
+        analyzed_count += len(chunk)
+
+        with timed("fold", items=len(chunk)):
+            touched = engine.add_batch(analyzed)
+
+        event = {"event": "progress", "analyzed": analyzed_count, "total": total}
+        if detail:
+            event["aggregate"] = engine.aggregate()
+            event["aspect_updates"] = engine.merged_aspects(touched)
+        yield event
+
+    counts = prep.as_dict()
+    if counts["comments"]:
+        log_event("analysis.preprocess", course_id=course_id, **counts)
+
+    if analyzed_count == 0:
+        yield {"event": "result", "payload": {
+            "course_id": course_id,
+            "raw_count": 0,
+            "detailed": [],
+            "aspect_list": []
+        }}
+        return
+
+    # merge_aspects + synthesize_review + aggregate_aspect_scores in one engine
+    fused = engine.result()
+    yield {"event": "result", "payload": _analysis_payload(
+        course_id, analyzed_count, fused["aspect_list"], fused["review"], fused["aggregate"]
+    )}
+
+
+def build_course_comparison(course_ids, limit=MAX_ANALYSIS_REVIEWS):
+    """
+    Per-course payloads (as /course/<course_id>/analysis builds them) for all
+    of `course_ids` from one review query and shared inference batches, plus a
+    category table and an overall ranking across the courses.
+    """
+    log_event("comparison.start", course_ids=course_ids, limit=limit)
+    prep = PreprocessStats()
+    compared = compare_courses(absa, course_ids, limit=limit, batch_size=REVIEW_READ_BATCH,
+                               persist=bool(ANALYZE_ON_INGEST), stats=prep)
+
+    courses = []
+    for course_id, entry in compared.items():
+        fused = entry["result"]
+        if fused is None:
+            courses.append({"course_id": course_id, "raw_count": 0, "detailed": [], "aspect_list": []})
+        else:
+            courses.append(_analysis_payload(
+                course_id, entry["raw_count"], fused["aspect_list"], fused["review"], fused["aggregate"]
+            ))
+
+    counts = prep.as_dict()
+    if counts["comments"]:
+        log_event("comparison.preprocess", course_ids=course_ids, **counts)
+
+    scored = [c for c in courses if c["raw_count"]]
+    return {
+        "course_ids": list(compared),
+        "courses": courses,
+        "comparison": {
+            "categories": category_table({c["course_id"]: c["review"]["categories"] for c in scored}),
+            "ranking": [
+                {
+                    "course_id": c["course_id"],
+                    "raw_count": c["raw_count"],
+                    "adjusted_score": c["aggregate"]["adjusted_score"],
+                    "overall_sentiment": c["aggregate"]["overall_sentiment"],
+                }
+                for c in sorted(scored, key=lambda c: -c["aggregate"]["adjusted_score"])
+            ],
+        },
+    }
+
+
+# side-by-side analysis: /courses/compare?ids=a,b,c (or repeated ?course_id=)
+@app.route("/courses/compare", methods=["GET"])
+def course_comparison():
+    ids = [i.strip() for value in request.args.getlist("ids") for i in value.split(",")]
+    ids += request.args.getlist("course_id")
+    course_ids = list(dict.fromkeys(i for i in ids if i))
+    if not course_ids:
+        return jsonify({"error": "At least one course id is required"}), 400
+    if len(course_ids) > COMPARE_MAX_COURSES:
+        return jsonify({"error": f"At most {COMPARE_MAX_COURSES} courses per comparison"}), 400
+    limit, error = _limit_arg()
+    if error:
+        return jsonify({"error": error}), 400
+
+    return _cached_json_response(
+        lambda: response_key(course_ids, get_review_versions(course_ids), absa.result_tag,
+                             compare=True, limit=limit, aspects=get_canonical_table().tag),
+        lambda: build_course_comparison(course_ids, limit=limit),
+    )
+
+
+# streaming variant: NDJSON by default, Server-Sent Events with ?format=sse
+@app.route("/course/<course_id>/analysis/stream", methods=["GET"])
+def course_analysis_stream(course_id):
+    sse = request.args.get("format") == "sse"
+    limit, error = _limit_arg()
+    if error:
+        return jsonify({"error": error}), 400
+
+    def generate():
+        try:
+            for event in iter_course_analysis(course_id, limit=limit):
+                body = app.json.dumps(event)
+                yield f"event: {event['event']}\ndata: {body}\n\n" if sse else body + "\n"
+        except Exception as e:
+            log_event("analysis.stream_failed", logging.ERROR, course_id=course_id, error=str(e))
+            body = app.json.dumps({"event": "error", "error": str(e)})
+            yield f"event: error\ndata: {body}\n\n" if sse else body + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _collect_job(job, url, max_results, analyze):
+    job.report(stage="collect")
+    video_id, count = fetch_and_store_comments(
+        url, max_results=max_results, analyze=analyze, absa=absa
+    )
+    job.report(stage="done", count=count)
+    return {"video_id": video_id, "count": count, **_queued_analysis(video_id, analyze)}
+
+
+def _bulk_collect_job(job, videos, max_results, analyze):
+    job.report(stage="collect", videos=len(videos))
+    summary = collect_many(videos, max_results=max_results, analyze=analyze, absa=absa)
+    job.report(stage="done", count=summary["inserted"], errors=summary["errors"])
+    return summary
+
+
+def _transcript_job(job, url, languages, refresh):
+    job.report(stage="transcript")
+    payload = ingest_transcript(url, absa, client=transcript_client, languages=languages, refresh=refresh,
+                                on_batch=lambda done: job.report(chunks=done))
+    job.report(stage="done", chunks=payload["chunks"])
+    return payload
+
+
+def _analysis_job(job, course_id, incremental, limit):
+    return build_course_analysis(course_id, job=job, incremental=incremental, limit=limit)
+
+
+# background variants: return a job id immediately, poll /jobs/<job_id>
+@app.route("/jobs/collect/youtube", methods=["POST"])
+def submit_collect_job():
+    data = request.json or {}
+    url = data.get("url")
+    max_results = int(data.get("max_results", MAX_COMMENTS))
+    analyze = data.get("analyze", ANALYZE_ON_INGEST)
+
+    video_id = extract_video_id(url) if url else None
+    if not video_id:
+        return jsonify({"error": "Valid YouTube URL is required"}), 400
+
+    key = f"{video_id}:{max_results}:{analyze}"
+    job = jobs.submit("collect", key, _collect_job, url, max_results, analyze)
+    return jsonify(job.to_dict(include_result=False)), 202
+
+
+@app.route("/jobs/collect/youtube/bulk", methods=["POST"])
+def submit_bulk_collect_job():
+    args, error = _bulk_request()
+    if error:
+        return jsonify({"error": error}), 400
+    videos, max_results, analyze = args
+
+    ids = ",".join(sorted({extract_video_id(v) or str(v) for v in videos if isinstance(v, str)}))
+    key = f"{ids}:{max_results}:{analyze}"
+    job = jobs.submit("collect_bulk", key, _bulk_collect_job, videos, max_results, analyze)
+    return jsonify(job.to_dict(include_result=False)), 202
+
+
+@app.route("/jobs/collect/youtube/transcript", methods=["POST"])
+def submit_transcript_job():
+    args, error = _transcript_request()
+    if error:
+        return jsonify({"error": error}), 400
+    url, languages, refresh = args
+
+    key = f"{extract_video_id(url)}:{','.join(languages or [])}:{refresh}"
+    job = jobs.submit("transcript", key, _transcript_job, url, languages, refresh)
+    return jsonify(job.to_dict(include_result=False)), 202
+
+
+@app.route("/jobs/course/<course_id>/analysis", methods=["POST"])
+def submit_analysis_job(course_id):
+    incremental = _flag("incremental", INCREMENTAL_ANALYSIS)
+    limit, error = _limit_arg()
+    if error:
+        return jsonify({"error": error}), 400
+    key = f"{course_id}:{incremental}:{limit}"
+    job = jobs.submit("analysis", key, _analysis_job, course_id, incremental, limit)
+    return jsonify(job.to_dict(include_result=False)), 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+# liveness: the process is up and serving, whatever the model state
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    return jsonify({
+        "status": "ok",
+        "uptime_seconds": round(time.time() - _started_at, 1),
+        "model": ABSAService.load_status(),
+    }), 200
+
+
+# readiness: 200 only once the model is loaded and can serve analysis
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    ready = ABSAService.is_ready()
+    return jsonify({
+        "ready": ready,
+        "model": ABSAService.load_status(),
+    }), 200 if ready else 503
+
+
+# reports whether the model (or each inference worker) is loaded
+@app.route("/inference/health", methods=["GET"])
+def inference_health():
+    return jsonify({
+        **ABSAService.health(),
+        "preprocess": ABSAService.preprocess_totals.as_dict(),
+        "prefilter": {"strictness": absa.prefilter, **ABSAService.prefilter_totals.as_dict()},
     }), 200
 
 
+# exposes hit/miss counters for the ABSA result cache
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    aspects = get_canonical_table().stats()
+    if absa.cache is None:
+        return jsonify({"enabled": False, "aspect_table": aspects}), 200
+    return jsonify({"enabled": True, **absa.cache.stats(), "aspect_table": aspects}), 200
+
+
+# Prometheus text format: stage latency histograms, items per stage, HTTP
+# latency, and the result/response cache counters
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    body = REGISTRY.render()
+    if absa.cache is not None:
+        stats = absa.cache.stats()
+        body += render_samples(
+            "absa_model_cache_lookups_total", "counter", "ABSA result cache lookups by outcome.",
+            [({"result": name}, stats[name]) for name in ("memory_hits", "persistent_hits", "misses")],
+        )
+        body += render_samples(
+            "absa_model_cache_entries", "gauge", "Entries in the in-process ABSA result cache.",
+            [({}, stats["memory_entries"])],
+        )
+    if responses is not None:
+        stats = responses.stats()
+        body += render_samples(
+            "absa_response_cache_requests_total", "counter", "Analysis response cache outcomes.",
+            [({"result": name}, stats[name]) for name in ("hits", "shared_hits", "misses", "not_modified")],
+        )
+    body += render_samples(
+        "absa_model_ready", "gauge", "1 once the ATEPC model is loaded.",
+        [({}, int(ABSAService.is_ready()))],
+    )
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/cache/responses/stats", methods=["GET"])
+def response_cache_stats():
+    if responses is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **responses.stats()}), 200
+
+
 if __name__ == "__main__":
+    create_app()
     atexit.register(clear_reviews_on_exit)
+    atexit.register(jobs.shutdown)
+    atexit.register(ABSAService.shutdown)
     try:
         app.run(debug=True, use_reloader=False, host="0.0.0.0", port=5000)
     except KeyboardInterrupt:
@@ -0,0 +1,108 @@
+# aspect_batch.py
+# Columnar container for parsed ATEPC rows. Instead of one dict per aspect
+# (five repeated keys, sentiment stored twice, the full comment text on every
+# row) a batch keeps parallel arrays: interned aspect strings, a one-byte
+# sentiment code, a float64 confidence and an index into a shared text list.
+# Dicts in today's shape are only built by to_dicts() / per_text().
+import math
+import sys
+from array import array
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SENTIMENT_LABELS = ("positive", "negative", "neutral")
+
+_NAN = float("nan")
+
+
+def _intern(aspect: Any) -> Any:
+    return sys.intern(aspect) if isinstance(aspect, str) else aspect
+
+
+def compact_rows(items: Iterable[Dict[str, Any]]) -> List[Tuple[Any, str, Any]]:
+    """(aspect, sentiment, confidence) tuples for parsed items; used by the result cache."""
+    return [(_intern(it["aspect"]), it["sentiment"], it["confidence"]) for it in items]
+
+
+def expand_rows(rows: Iterable[Tuple[Any, str, Any]], text: Optional[str]) -> List[Dict[str, Any]]:
+    """Inverse of compact_rows: today's parsed-item dicts for one source text."""
+    return [
+        {"aspect": a, "sentiment": s, "polarity": s, "confidence": c, "_source_text": text}
+        for a, s, c in rows
+    ]
+
+
+class AspectBatch:
+    __slots__ = ("texts", "text_index", "aspects", "sentiment_codes", "confidences",
+                 "labels", "_label_codes")
+
+    def __init__(self):
+        self.texts: List[Optional[str]] = []
+        self.text_index = array("I")
+        self.aspects: List[Any] = []
+        self.sentiment_codes = array("B")
+        self.confidences = array("d")      # NaN stands for a missing confidence
+        self.labels: List[str] = list(SENTIMENT_LABELS)
+        self._label_codes = {label: i for i, label in enumerate(self.labels)}
+
+    def __len__(self) -> int:
+        return len(self.aspects)
+
+    def add_text(self, text: Optional[str]) -> int:
+        self.texts.append(text)
+        return len(self.texts) - 1
+
+    def _code(self, sentiment: str) -> int:
+        code = self._label_codes.get(sentiment)
+        if code is None:
+            code = self._label_codes[sentiment] = len(self.labels)
+            self.labels.append(sentiment)
+        return code
+
+    def append(self, text_idx: int, aspect: Any, sentiment: str, confidence: Any) -> None:
+        self.text_index.append(text_idx)
+        self.aspects.append(_intern(aspect))
+        self.sentiment_codes.append(self._code(sentiment))
+        self.confidences.append(_NAN if confidence is None else confidence)
+
+    def extend_rows(self, text: Optional[str], rows: Iterable[Tuple[Any, str, Any]]) -> int:
+        """Adds one source text and its (aspect, sentiment, confidence) rows."""
+        idx = self.add_text(text)
+        for aspect, sentiment, confidence in rows:
+            self.append(idx, aspect, sentiment, confidence)
+        return idx
+
+    def extend_columns(self, texts: List[Optional[str]], lengths: List[int], aspects: List[Any],
+                       sentiments: List[str], confidences: List[Any]) -> None:
+        """Adds one text per entry of `lengths`, followed by that many rows of the flat columns."""
+        first = len(self.texts)
+        self.texts.extend(texts)
+        for offset, n in enumerate(lengths):
+            if n:
+                self.text_index.extend(repeat(first + offset, n))
+        self.aspects.extend(map(_intern, aspects))
+        codes = self._label_codes
+        self.sentiment_codes.extend([codes[s] if s in codes else self._code(s) for s in sentiments])
+        self.confidences.extend([_NAN if c is None else c for c in confidences])
+
+    def _row(self, i: int) -> Dict[str, Any]:
+        sentiment = self.labels[self.sentiment_codes[i]]
+        confidence = self.confidences[i]
+        return {
+            "aspect": self.aspects[i],
+            "sentiment": sentiment,
+            "polarity": sentiment,
+            "confidence": None if math.isnan(confidence) else confidence,
+            "_source_text": self.texts[self.text_index[i]],
+        }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Flattened rows in today's dict form (for the JSON boundary)."""
+        return [self._row(i) for i in range(len(self))]
+
+    def per_text(self) -> List[List[Dict[str, Any]]]:
+        """Rows grouped per source text, like analyze_batch returns them."""
+        grouped: List[List[Dict[str, Any]]] = [[] for _ in self.texts]
+        for i in range(len(self)):
+            grouped[self.text_index[i]].append(self._row(i))
+        return grouped
@@ -1,30 +1,44 @@
-from collections import defaultdict
 
-def merge_aspects(aspect_list):
-    # Step 1: group every aspect
-    grouped = defaultdict(list)
+from aspect_normalize import group_aspect_stats
 
-    for it in aspect_list:
-        aspect = it["aspect"]
-        sentiment = it["sentiment"]
-        confidence = it["confidence"] or 0.0
-
-        # convert sentiment to signed number
-        if sentiment == "positive":
-            signed = +confidence
-        elif sentiment == "negative":
-            signed = -confidence
-        else:
-            signed = 0.0
 
-        grouped[aspect].append(signed)
+def signed_aspect_score(it):
+    """Signed confidence of one analyzed item, as merge_aspects scores it."""
+    sentiment = it["sentiment"]
+    confidence = it["confidence"] or 0.0
+
+    # convert sentiment to signed number
+    if sentiment == "positive":
+        return +confidence
+    elif sentiment == "negative":
+        return -confidence
+    return 0.0
+
 
-    # Step 2: compute merged result
+def accumulate_aspects(stats, aspect_list):
+    """
+    Folds analyzed items into running per-aspect [signed_sum, count] stats.
+    `stats` is a plain dict (aspect -> [sum, count]) and keeps first-seen order.
+    """
+    for it in aspect_list:
+        entry = stats.get(it["aspect"])
+        if entry is None:
+            entry = stats[it["aspect"]] = [0.0, 0]
+        entry[0] += signed_aspect_score(it)
+        entry[1] += 1
+    return stats
+
+
+def finalize_aspects(stats):
+    """
+    Turns per-aspect [signed_sum, count] stats into the merged aspect list,
+    one row per canonical aspect (see aspect_normalize).
+    """
     merged = []
 
-    for aspect, signed_scores in grouped.items():
+    for aspect, (score_sum, count) in group_aspect_stats(stats).items():
 
-        avg = sum(signed_scores) / len(signed_scores)   # average signed
+        avg = score_sum / count   # average signed
 
         # determine final sentiment
         if avg > 0:
@@ -41,3 +55,8 @@ def merge_aspects(aspect_list):
         })
 
     return merged
+
+
+def merge_aspects(aspect_list):
+    # Step 1: group every aspect, Step 2: compute merged result
+    return finalize_aspects(accumulate_aspects({}, aspect_list))
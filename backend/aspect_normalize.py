@@ -0,0 +1,234 @@
+# aspect_normalize.py
+# Maps extracted aspect strings onto canonical aspects before they are merged,
+# so "video", "videos", "the video" and "vid" end up as one aspect_list row.
+#
+#   lemma    lowercases, drops leading determiners and edge punctuation,
+#            expands a few abbreviations and singularizes the head (last) word
+#   cluster  lemma, then joins aspects whose character-trigram Jaccard
+#            similarity reaches the threshold ("explaination" -> "explanation")
+#
+# Clusters are formed per merge from the aspects being merged and their
+# mention counts only: lemma keys are placed most-mentioned first (ties
+# alphabetical), each joining the closest representative placed before it or
+# becoming one. The result depends on what is merged, never on the order the
+# process first saw the aspects, so it is the same in every worker and for the
+# full, incremental and streaming paths. Candidates come from a MinHash/LSH
+# index over the representatives, and a key is compared with representatives
+# only (never with other members), so clusters don't chain. The table caches
+# the per-aspect work (lemma keys, LSH signatures) for the life of the process.
+import re
+import threading
+import zlib
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from settings import (
+    ASPECT_NORMALIZATION,
+    ASPECT_CLUSTER_THRESHOLD,
+    ASPECT_CLUSTER_MIN_LENGTH,
+    ASPECT_CANONICAL_MAX,
+)
+
+MODES = ("off", "lemma", "cluster")
+
+_DETERMINERS = frozenset("the a an this that these those his her your my our their its".split())
+_EDGE_PUNCT = " .,!?;:\"'`()[]{}*-_~"
+_ws = re.compile(r"\s+")
+
+_ABBREVIATIONS = {
+    "vid": "video", "vids": "video", "vdo": "video", "vedio": "video",
+    "mic": "microphone", "mike": "microphone",
+    "prof": "professor", "sem": "semester", "explaination": "explanation",
+}
+_IRREGULAR = {
+    "children": "child", "people": "person", "men": "man", "women": "woman",
+    "formulae": "formula", "indices": "index", "analyses": "analysis",
+}
+# words ending in "s" that are not plurals
+_SINGULAR_S = frozenset("series species news physics mathematics maths economics basics ads".split())
+
+
+def _singular(word: str) -> str:
+    if word in _IRREGULAR:
+        return _IRREGULAR[word]
+    if len(word) <= 3 or not word.isalpha() or word in _SINGULAR_S:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def lemma_key(aspect: str) -> str:
+    """Lowercased, determiner-free aspect with its head word singularized."""
+    words = _ws.sub(" ", aspect.lower()).strip(_EDGE_PUNCT).split(" ")
+    while len(words) > 1 and words[0] in _DETERMINERS:
+        words = words[1:]
+    words = [_ABBREVIATIONS.get(w, w) for w in words]
+    words[-1] = _singular(words[-1])
+    return " ".join(words) or aspect
+
+
+def trigrams(key: str) -> FrozenSet[str]:
+    padded = f"#{key}#"
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class CanonicalTable:
+    """
+    Canonical aspects for a set of aspects (`assign`). Representatives are
+    indexed by `bands` LSH bands of `rows` MinHash values each; lemma keys and
+    signatures are cached, up to `max_size` entries each.
+    """
+
+    _PRIME = (1 << 31) - 1
+
+    def __init__(self, mode: str = "cluster", threshold: float = 0.6, min_length: int = 5,
+                 max_size: int = 100_000, bands: int = 20, rows: int = 3, seed: int = 1):
+        if mode not in MODES:
+            raise ValueError(f"Unknown aspect normalization {mode!r}; expected one of {MODES}")
+        self.mode = mode
+        self.threshold = threshold
+        self.min_length = min_length
+        self.max_size = max_size
+        self.bands = bands
+        self.rows = rows
+        rnd = np.random.default_rng(seed)
+        self._a = rnd.integers(1, self._PRIME, size=bands * rows, dtype=np.int64)
+        self._b = rnd.integers(0, self._PRIME, size=bands * rows, dtype=np.int64)
+
+        self._keys: Dict[str, str] = {}                                     # aspect -> lemma key
+        self._signatures: Dict[str, Tuple[FrozenSet[str], List[Tuple[int, bytes]]]] = {}
+        self._lock = threading.Lock()
+        self._counts = {"merges": 0, "keys": 0, "lemma_merged": 0, "cluster_merged": 0, "candidates": 0}
+
+    @property
+    def tag(self) -> str:
+        """Identifies everything that decides the grouping (for cache keys)."""
+        if self.mode == "cluster":
+            return f"cluster:{self.threshold}:{self.min_length}:{self.bands}x{self.rows}"
+        return self.mode
+
+    def _bands(self, grams: FrozenSet[str]) -> List[Tuple[int, bytes]]:
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.int64, count=len(grams))
+        signature = ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % self._PRIME).min(axis=1)
+        return [(i, signature[i * self.rows:(i + 1) * self.rows].tobytes()) for i in range(self.bands)]
+
+    def lemma(self, aspect: Any) -> Any:
+        """lemma_key of `aspect`; None and non-strings are returned unchanged."""
+        if not isinstance(aspect, str):
+            return aspect
+        key = self._keys.get(aspect)
+        if key is None:
+            key = lemma_key(aspect)
+            if len(self._keys) < self.max_size:
+                self._keys[aspect] = key
+        return key
+
+    def _signature(self, key: str) -> Tuple[FrozenSet[str], List[Tuple[int, bytes]]]:
+        sig = self._signatures.get(key)
+        if sig is None:
+            grams = trigrams(key)
+            sig = (grams, self._bands(grams))
+            if len(self._signatures) < self.max_size:
+                self._signatures[key] = sig
+        return sig
+
+    def _clusters(self, key_counts: Dict[str, int]) -> Dict[str, str]:
+        """Lemma key -> representative key; placed most-mentioned first, ties alphabetical."""
+        rep_of: Dict[str, str] = {}
+        buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        merged = candidates = 0
+        for key in sorted(key_counts, key=lambda k: (-key_counts[k], k)):
+            if len(key) < self.min_length:
+                rep_of[key] = key
+                continue
+            grams, bands = self._signature(key)
+            best, best_score = None, self.threshold
+            seen = set()
+            for band in bands:
+                for candidate in buckets.get(band, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    score = jaccard(grams, self._signature(candidate)[0])
+                    if score > best_score or (score == best_score and best is None):
+                        best, best_score = candidate, score
+            candidates += len(seen)
+            if best is not None:
+                rep_of[key] = best
+                merged += 1
+                continue
+            rep_of[key] = key
+            for band in bands:
+                buckets.setdefault(band, []).append(key)
+        self._counts["cluster_merged"] += merged
+        self._counts["candidates"] += candidates
+        return rep_of
+
+    def assign(self, aspects: Sequence[Any], counts: Sequence[int]) -> List[Any]:
+        """
+        Canonical aspect of each of the distinct `aspects`, given how often each
+        was mentioned. None and non-strings are returned unchanged.
+        """
+        if self.mode == "off":
+            return list(aspects)
+        with self._lock:
+            keys = [self.lemma(a) for a in aspects]
+            key_counts: Dict[str, int] = {}
+            for key, n in zip(keys, counts):
+                if isinstance(key, str):
+                    key_counts[key] = key_counts.get(key, 0) + int(n)
+            self._counts["merges"] += 1
+            self._counts["keys"] += len(key_counts)
+            self._counts["lemma_merged"] += sum(1 for k in keys if isinstance(k, str)) - len(key_counts)
+            if self.mode == "lemma":
+                return keys
+            rep_of = self._clusters(key_counts)
+            return [rep_of.get(k, k) if isinstance(k, str) else k for k in keys]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": self.mode, "tag": self.tag, "cached_aspects": len(self._keys),
+                    "cached_signatures": len(self._signatures), **self._counts}
+
+
+_default_table: Optional[CanonicalTable] = None
+_default_lock = threading.Lock()
+
+
+def get_canonical_table() -> CanonicalTable:
+    """Process-wide table configured from settings; built on first use."""
+    global _default_table
+    if _default_table is None:
+        with _default_lock:
+            if _default_table is None:
+                _default_table = CanonicalTable(
+                    ASPECT_NORMALIZATION, ASPECT_CLUSTER_THRESHOLD, ASPECT_CLUSTER_MIN_LENGTH,
+                    ASPECT_CANONICAL_MAX,
+                )
+    return _default_table
+
+
+def group_aspect_stats(stats: Dict[Any, List[float]], table: Optional[CanonicalTable] = None) -> Dict[Any, List[float]]:
+    """Per-aspect [signed_sum, count] stats summed per canonical aspect, in first-seen order."""
+    table = table or get_canonical_table()
+    if table.mode == "off":
+        return stats
+    canonical = table.assign(list(stats), [count for _, count in stats.values()])
+    grouped: Dict[Any, List[float]] = {}
+    for name, (score_sum, count) in zip(canonical, stats.values()):
+        entry = grouped.get(name)
+        if entry is None:
+            entry = grouped[name] = [0.0, 0]
+        entry[0] += score_sum
+        entry[1] += count
+    return grouped
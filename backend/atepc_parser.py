@@ -0,0 +1,169 @@
+# atepc_parser.py
+# Turns raw extract_aspect results into (aspect, sentiment, confidence) rows
+# without recursion or per-element method calls. The shape of a batch is
+# detected once: when it is pyabsa's own schema (a flat list of same-keyed
+# dicts with parallel lists) the whole batch is flattened into columns with
+# C-level map/chain; anything else (alternate keys, nested lists, bare
+# sentiment strings, length mismatches) goes through an explicit-stack walk.
+# Both produce exactly what the old recursive ABSAService._parse_atepc_result
+# produced, item for item.
+import sys
+from itertools import chain, islice
+from typing import Any, Dict, List, Optional, Tuple
+
+from aspect_batch import AspectBatch
+
+Row = Tuple[Any, str, Any]
+
+SENTIMENT_MAP = {
+    "positive": "positive",
+    "negative": "negative",
+    "neutral":  "neutral",
+    "pos": "positive",
+    "neg": "negative",
+    "neu": "neutral"
+}
+
+# raw label (as the model spells it) -> normalized, interned label
+_label_table: Dict[str, str] = {}
+_LABEL_TABLE_MAX = 4096
+
+for _raw, _label in SENTIMENT_MAP.items():
+    for _variant in (_raw, _raw.upper(), _raw.capitalize()):
+        _label_table[_variant] = sys.intern(_label)
+
+
+def normalize_sentiment(s: Any) -> str:
+    if not s:
+        return "neutral"
+    if isinstance(s, str):
+        label = _label_table.get(s)
+        if label is None:
+            low = s.lower()
+            label = sys.intern(SENTIMENT_MAP.get(low, low))
+            if len(_label_table) < _LABEL_TABLE_MAX:
+                _label_table[s] = label
+        return label
+    return str(s).lower()
+
+
+def _dict_rows(d: Dict[str, Any], out: List[Row]) -> None:
+    aspects = d.get("aspect") or d.get("aspect_term") or d.get("extracted_aspect") or []
+    sentiments = d.get("sentiment") or d.get("polarity") or d.get("sentiment_pred") or []
+    confidences = d.get("confidence") or d.get("sentiment_confidence") or []
+
+    if isinstance(aspects, str):
+        aspects = [aspects]
+    if isinstance(sentiments, str):
+        sentiments = [sentiments]
+    if isinstance(confidences, (int, float)):
+        confidences = [confidences]
+
+    label = _label_table.get
+    if isinstance(aspects, list) and isinstance(sentiments, list) and len(aspects) == len(sentiments):
+        if not aspects:
+            return
+        # common case, done in C: non-empty string aspects, known labels, a
+        # confidence for every aspect
+        if confidences.__class__ is list and len(confidences) >= len(aspects):
+            try:
+                lowered = list(map(str.lower, aspects))
+                labels = list(map(label, sentiments))
+            except TypeError:
+                lowered = None
+            if lowered is not None and all(lowered) and None not in labels:
+                out.extend(zip(map(sys.intern, lowered), labels, confidences))
+                return
+
+        n_conf = len(confidences)
+        for i, (a, s) in enumerate(zip(aspects, sentiments)):
+            out.append((
+                sys.intern(a.lower()) if a else None,
+                (label(s) if s.__class__ is str else None) or normalize_sentiment(s),
+                confidences[i] if i < n_conf else None,
+            ))
+    elif isinstance(aspects, list) and aspects:
+        out.extend((sys.intern(a.lower()) if a else None, "neutral", None) for a in aspects)
+    elif isinstance(sentiments, list) and sentiments:
+        out.extend((None, normalize_sentiment(s), None) for s in sentiments)
+
+
+def parse_rows(raw_result: Any) -> List[Row]:
+    """Rows for one extract_aspect result of any supported shape."""
+    out: List[Row] = []
+    stack = [iter((raw_result,))]
+    while stack:
+        for node in stack[-1]:
+            if node is None:
+                continue
+            if isinstance(node, list):
+                stack.append(iter(node))
+                break
+            if isinstance(node, str):
+                out.append((None, normalize_sentiment(node), None))
+            elif isinstance(node, dict):
+                _dict_rows(node, out)
+        else:
+            stack.pop()
+    return out
+
+
+_ALTERNATE_KEYS = ("aspect_term", "extracted_aspect", "polarity", "sentiment_pred", "sentiment_confidence")
+
+
+def _pyabsa_columns(raw_results: List[Any]):
+    """
+    Whole-batch fast path for pyabsa's own schema: every result a dict with the
+    same keys, none of the alternate key names, parallel lists of aspects,
+    labels and confidences. Returns (lengths, aspects, sentiments, confidences)
+    flattened across the batch, or None if any result needs the general parser.
+    """
+    if not raw_results or not all(r.__class__ is dict for r in raw_results):
+        return None
+    keys = raw_results[0].keys()
+    if any(k in keys for k in _ALTERNATE_KEYS) or not all(r.keys() == keys for r in raw_results):
+        return None
+
+    aspects = [r.get("aspect") or [] for r in raw_results]
+    sentiments = [r.get("sentiment") or [] for r in raw_results]
+    confidences = [r.get("confidence") or [] for r in raw_results]
+    if not (all(a.__class__ is list for a in aspects)
+            and all(c.__class__ is list for c in sentiments)
+            and all(c.__class__ is list for c in confidences)):
+        return None
+
+    lengths = list(map(len, aspects))
+    if lengths != list(map(len, sentiments)) or lengths != list(map(len, confidences)):
+        return None
+
+    try:
+        flat_aspects = list(map(str.lower, chain.from_iterable(aspects)))
+        flat_labels = list(map(_label_table.get, chain.from_iterable(sentiments)))
+    except TypeError:
+        return None
+    if not all(flat_aspects) or None in flat_labels:
+        return None
+    return lengths, list(map(sys.intern, flat_aspects)), flat_labels, list(chain.from_iterable(confidences))
+
+
+def parse_batch_rows(raw_results: List[Any]) -> List[List[Row]]:
+    """Per-result rows for a whole extract_aspect batch."""
+    columns = _pyabsa_columns(raw_results)
+    if columns is not None:
+        lengths, aspects, labels, confidences = columns
+        rows = zip(aspects, labels, confidences)
+        return [list(islice(rows, n)) for n in lengths]
+    return [parse_rows(r) for r in raw_results]
+
+
+def parse_batch(raw_results: List[Any], texts: List[Optional[str]],
+                batch: Optional[AspectBatch] = None) -> AspectBatch:
+    """Columnar form of a batch: one text entry per result, rows appended in order."""
+    batch = batch if batch is not None else AspectBatch()
+    columns = _pyabsa_columns(raw_results)
+    if columns is not None:
+        batch.extend_columns(texts, *columns)
+        return batch
+    for text, rows in zip(texts, map(parse_rows, raw_results)):
+        batch.extend_rows(text, rows)
+    return batch
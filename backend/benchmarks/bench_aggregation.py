@@ -0,0 +1,73 @@
+# bench_aggregation.py
+# Three separate passes (merge_aspects, synthesize_review, aggregate_aspect_scores)
+# versus the fused AggregationEngine on synthetic analyzed aspect rows.
+#
+#   cd backend && python benchmarks/bench_aggregation.py [n_rows]
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregation_engine import fused_aggregate
+from aggregator import aggregate_aspect_scores
+from aspect_merge import merge_aspects
+from review_synthesizer import ASPECT_KEYWORDS, synthesize_review
+
+
+def make_rows(n, distinct_aspects=5000, seed=0):
+    rnd = random.Random(seed)
+    keywords = [kw for kws in ASPECT_KEYWORDS.values() for kw in kws]
+    aspects = [
+        f"{rnd.choice(['', 'the ', 'her ', 'new '])}{rnd.choice(keywords)}{rnd.choice(['', 's', ' part'])}"
+        if rnd.random() < 0.7 else f"thing{i}"
+        for i in range(distinct_aspects)
+    ]
+    sentiments = ["positive", "negative", "neutral"]
+    return [
+        {
+            "aspect": rnd.choice(aspects),
+            "sentiment": rnd.choice(sentiments),
+            "polarity": None,
+            "confidence": round(rnd.uniform(0.5, 1.0), 4),
+        }
+        for _ in range(n)
+    ]
+
+
+def three_pass(rows):
+    aspect_list = merge_aspects(rows)
+    return {
+        "aspect_list": aspect_list,
+        "review": synthesize_review(aspect_list),
+        "aggregate": aggregate_aspect_scores(rows),
+    }
+
+
+def timed(fn, rows, repeat=3):
+    best, out = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(rows)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+
+def main(n=1_000_000):
+    rows = make_rows(n)
+    t_old, old = timed(three_pass, rows)
+    t_new, new = timed(fused_aggregate, rows)
+
+    identical = json.dumps(old, sort_keys=True) == json.dumps(new, sort_keys=True)
+    print(f"{n:,} rows, {len(old['aspect_list'])} distinct aspects, identical output: {identical}")
+    print(f"  three passes  {t_old * 1e3:9.1f} ms  {n / t_old:12,.0f} rows/s")
+    print(f"  fused engine  {t_new * 1e3:9.1f} ms  {n / t_new:12,.0f} rows/s  x{t_old / t_new:.2f}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
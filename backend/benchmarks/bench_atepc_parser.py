@@ -0,0 +1,202 @@
+# bench_atepc_parser.py
+# The recursive per-result parser ABSAService used before atepc_parser, versus
+# the batch parser, on pyabsa-shaped results. Both must reproduce the golden
+# fixtures in fixtures/atepc_golden.json, which cover every shape the parser
+# accepts (alternative keys, bare strings, nested lists, length mismatches).
+# The ingest table times what analyze_reviews does per batch: parse, then the
+# stored analysis fields, with and without the item-dict round trip.
+#
+#   cd backend && python benchmarks/bench_atepc_parser.py [n_results]
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aspect_batch import expand_rows
+from aspect_batch import compact_rows
+from atepc_parser import SENTIMENT_MAP, parse_batch, parse_batch_rows, parse_rows
+from ingest_analysis import analysis_fields, row_analysis_fields
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "atepc_golden.json")
+
+
+def _normalize_sentiment(s):
+    if not s:
+        return "neutral"
+    if isinstance(s, str):
+        return SENTIMENT_MAP.get(s.lower(), s.lower())
+    return str(s).lower()
+
+
+def legacy_parse(raw_result, source_text=None):
+    """The recursive parser as it was, kept verbatim for comparison."""
+    items = []
+
+    if raw_result is None:
+        return items
+
+    if isinstance(raw_result, list):
+        for elem in raw_result:
+            items.extend(legacy_parse(elem, source_text))
+        return items
+
+    if isinstance(raw_result, str):
+        items.append({
+            "aspect": None,
+            "sentiment": _normalize_sentiment(raw_result),
+            "polarity": _normalize_sentiment(raw_result),
+            "confidence": None,
+            "_source_text": source_text
+        })
+        return items
+
+    if isinstance(raw_result, dict):
+        aspects = (
+            raw_result.get("aspect")
+            or raw_result.get("aspect_term")
+            or raw_result.get("extracted_aspect")
+            or []
+        )
+        sentiments = (
+            raw_result.get("sentiment")
+            or raw_result.get("polarity")
+            or raw_result.get("sentiment_pred")
+            or []
+        )
+        confidences = (
+            raw_result.get("confidence")
+            or raw_result.get("sentiment_confidence")
+            or []
+        )
+
+        if isinstance(aspects, str):
+            aspects = [aspects]
+        if isinstance(sentiments, str):
+            sentiments = [sentiments]
+        if isinstance(confidences, (int, float)):
+            confidences = [confidences]
+
+        if isinstance(aspects, list) and isinstance(sentiments, list) and len(aspects) == len(sentiments):
+            for i, (a, s) in enumerate(zip(aspects, sentiments)):
+                conf = confidences[i] if i < len(confidences) else None
+                items.append({
+                    "aspect": a.lower() if a else None,
+                    "sentiment": _normalize_sentiment(s),
+                    "polarity": _normalize_sentiment(s),
+                    "confidence": conf,
+                    "_source_text": source_text
+                })
+            return items
+
+        if isinstance(aspects, list) and len(aspects) > 0:
+            for a in aspects:
+                items.append({
+                    "aspect": a.lower() if a else None,
+                    "sentiment": "neutral",
+                    "polarity": "neutral",
+                    "confidence": None,
+                    "_source_text": source_text
+                })
+            return items
+
+        if isinstance(sentiments, list) and len(sentiments) > 0:
+            for s in sentiments:
+                items.append({
+                    "aspect": None,
+                    "sentiment": _normalize_sentiment(s),
+                    "polarity": _normalize_sentiment(s),
+                    "confidence": None,
+                    "_source_text": source_text
+                })
+            return items
+
+    return items
+
+
+def check_golden(path=GOLDEN):
+    with open(path, encoding="utf-8") as f:
+        cases = json.load(f)
+    failures = 0
+    for case in cases:
+        got = expand_rows(parse_rows(case["raw"]), case["source_text"])
+        if got != case["expected"] or legacy_parse(case["raw"], case["source_text"]) != case["expected"]:
+            failures += 1
+            print(f"  mismatch: {case['name']}")
+    # the batch entry points must agree with the single-result one
+    raws = [c["raw"] for c in cases]
+    texts = [c["source_text"] for c in cases]
+    batch_items = [expand_rows(r, t) for r, t in zip(parse_batch_rows(raws), texts)]
+    if batch_items != [c["expected"] for c in cases]:
+        failures += 1
+        print("  mismatch: parse_batch_rows")
+    return len(cases), failures
+
+
+def make_results(n, seed=0):
+    rnd = random.Random(seed)
+    words = ["teacher", "slides", "audio", "pacing", "examples", "video", "course", "projects"]
+    labels = ["Positive", "Negative", "Neutral"]
+    results = []
+    for i in range(n):
+        k = rnd.choice((0, 1, 1, 2, 2, 3, 4))
+        results.append({
+            "sentence": f"comment {i}",
+            "IOB": [],
+            "tokens": [],
+            "aspect": [rnd.choice(words).capitalize() for _ in range(k)],
+            "position": [[j] for j in range(k)],
+            "sentiment": [rnd.choice(labels) for _ in range(k)],
+            "probs": [],
+            "confidence": [round(rnd.uniform(0.5, 1.0), 4) for _ in range(k)],
+        })
+    return results, [r["sentence"] for r in results]
+
+
+def _report(cases, n):
+    baseline = None
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=1, repeat=5))
+        baseline = baseline or best
+        print(f"  {name:24s} {best * 1e3:9.2f} ms  {n / best:12,.0f}/s  x{baseline / best:.1f}")
+
+
+def main(n=10_000):
+    total, failures = check_golden()
+    print(f"golden fixtures: {total - failures}/{total} identical")
+
+    results, texts = make_results(n)
+    legacy = [legacy_parse(r, t) for r, t in zip(results, texts)]
+    assert legacy == [expand_rows(rows, t) for rows, t in zip(parse_batch_rows(results), texts)], "outputs differ"
+
+    cases = {
+        "recursive (dicts)": lambda: [legacy_parse(r, t) for r, t in zip(results, texts)],
+        "batch rows": lambda: parse_batch_rows(results),
+        "batch rows -> dicts": lambda: [expand_rows(rows, t) for rows, t in zip(parse_batch_rows(results), texts)],
+        "batch -> AspectBatch": lambda: parse_batch(results, texts),
+    }
+    print(f"{n:,} results, {sum(len(x) for x in legacy):,} aspect rows")
+    _report(cases, n)
+
+    def round_trip():
+        items = [expand_rows(rows, t) for rows, t in zip(parse_batch_rows(results), texts)]
+        return [compact_rows(it) for it in items], [analysis_fields(it, "tag") for it in items]
+
+    def rows_only():
+        rows = parse_batch_rows(results)
+        return rows, [row_analysis_fields(r, "tag") for r in rows]
+
+    print("ingest: parse + stored analysis fields")
+    _report({
+        "recursive (dicts)": lambda: [analysis_fields(legacy_parse(r, t), "tag") for r, t in zip(results, texts)],
+        "rows -> dicts -> rows": round_trip,
+        "rows": rows_only,
+    }, n)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
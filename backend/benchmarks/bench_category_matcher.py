@@ -0,0 +1,71 @@
+# bench_category_matcher.py
+# Compares the old nested-loop map_aspect_category against the compiled regex
+# and Aho-Corasick matchers (uncached), plus the memoized public function.
+#
+#   cd backend && python benchmarks/bench_category_matcher.py [n_aspects]
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import review_synthesizer
+from review_synthesizer import ASPECT_KEYWORDS, _RegexMatcher, _AhoCorasickMatcher
+
+
+def nested_loop(aspect):
+    """The original implementation, kept here as the baseline."""
+    if not aspect:
+        return "misc"
+    aspect = aspect.lower().strip()
+    for category, keywords in ASPECT_KEYWORDS.items():
+        for kw in keywords:
+            if kw in aspect:
+                return category
+    return "misc"
+
+
+def make_aspects(n, distinct=2000, seed=0):
+    rnd = random.Random(seed)
+    keywords = [kw for kws in ASPECT_KEYWORDS.values() for kw in kws]
+    filler = ["the", "new", "overall", "her", "his", "this", "great", "whole", "xyz", "thing"]
+    pool = []
+    for _ in range(distinct):
+        words = rnd.sample(filler, rnd.randint(0, 2))
+        if rnd.random() < 0.6:
+            words.append(rnd.choice(keywords))
+        pool.append(" ".join(words) or rnd.choice(filler))
+    return [rnd.choice(pool) for _ in range(n)]
+
+
+def main(n=100_000):
+    aspects = make_aspects(n)
+    normalized = [a.lower().strip() for a in aspects]
+    regex = _RegexMatcher(ASPECT_KEYWORDS)
+    aho = _AhoCorasickMatcher(ASPECT_KEYWORDS)
+
+    assert [nested_loop(a) for a in aspects] == [regex.match(a) for a in normalized] \
+        == [aho.match(a) for a in normalized], "matchers disagree"
+
+    def run_memoized():
+        review_synthesizer._map_normalized.cache_clear()
+        for a in aspects:
+            review_synthesizer.map_aspect_category(a)
+
+    cases = {
+        "nested_loop": lambda: [nested_loop(a) for a in aspects],
+        "regex": lambda: [regex.match(a) for a in normalized],
+        "aho_corasick": lambda: [aho.match(a) for a in normalized],
+        "map_aspect_category (memoized)": run_memoized,
+    }
+    baseline = None
+    print(f"{n} aspects, {len(set(aspects))} distinct")
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=1, repeat=3))
+        baseline = baseline or best
+        print(f"  {name:32s} {best * 1e3:9.1f} ms  {n / best:12,.0f}/s  x{baseline / best:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
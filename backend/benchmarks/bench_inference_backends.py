@@ -0,0 +1,102 @@
+# bench_inference_backends.py
+# Accuracy parity and CPU throughput of the int8 / ONNX inference backends
+# against the stock pyabsa model, on the fixture comments in fixtures/.
+# Parity is aspect-level: F1 of the (lowercased) aspect sets per comment, and
+# sentiment agreement on the aspects both backends found. Exits 1 when a
+# backend's F1 falls below --min-f1 or it can't be built.
+#
+#   cd backend && python benchmarks/bench_inference_backends.py [--backends int8 onnx] [--repeat 5]
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import ABSAService
+from inference_backends import BACKENDS, load_extractor
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "atepc_parity.txt")
+
+
+def load_fixtures(path=FIXTURES):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def run_backend(checkpoint, backend, texts, batch_size, repeat):
+    extractor, active = load_extractor(checkpoint, backend)
+    parser = ABSAService(checkpoint, use_cache=False, preprocess=False)
+
+    def once():
+        out = []
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            raw = extractor.extract_aspect(inference_source=chunk, pred_sentiment=True, save_result=False)
+            out.extend(parser._parse_atepc_result(r, source_text=t) for r, t in zip(raw, chunk))
+        return out
+
+    results = once()  # warm-up; also exports the ONNX graph on first use
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        once()
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return active, results, {"seconds": round(best, 4), "texts_per_sec": round(len(texts) / best, 1)}
+
+
+def parity(reference, candidate):
+    tp = fp = fn = agree = 0
+    for ref_items, cand_items in zip(reference, candidate):
+        ref = {str(it["aspect"]).lower(): it["sentiment"] for it in ref_items}
+        cand = {str(it["aspect"]).lower(): it["sentiment"] for it in cand_items}
+        common = ref.keys() & cand.keys()
+        tp += len(common)
+        fp += len(cand.keys() - common)
+        fn += len(ref.keys() - common)
+        agree += sum(1 for a in common if ref[a] == cand[a])
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "aspect_f1": round(f1, 4),
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "sentiment_agreement": round(agree / tp, 4) if tp else None,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--checkpoint", default="multilingual")
+    ap.add_argument("--backends", nargs="+", default=[b for b in BACKENDS if b != "pyabsa"])
+    ap.add_argument("--batch-size", type=int, default=16)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--min-f1", type=float, default=0.95)
+    args = ap.parse_args()
+
+    texts = load_fixtures()
+    _, reference, ref_speed = run_backend(args.checkpoint, "pyabsa", texts, args.batch_size, args.repeat)
+    report = {"fixtures": len(texts), "pyabsa": ref_speed}
+
+    failed = False
+    for backend in args.backends:
+        try:
+            active, results, speed = run_backend(args.checkpoint, backend, texts, args.batch_size, args.repeat)
+        except RuntimeError as e:
+            report[backend] = {"error": str(e)}
+            failed = True
+            continue
+        entry = dict(speed, active_backend=active, **parity(reference, results))
+        entry["speedup"] = round(ref_speed["seconds"] / speed["seconds"], 2)
+        report[backend] = entry
+        failed |= entry["aspect_f1"] < args.min_f1
+
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
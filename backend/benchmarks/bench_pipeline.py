@@ -0,0 +1,148 @@
+# bench_pipeline.py
+# Per-stage and end-to-end timings of the analysis pipeline on synthetic
+# comment corpora of several sizes. The model is replaced by a deterministic
+# fake extractor unless --real-model is given, so runs are reproducible and
+# every non-model stage can be measured offline. Results (p50/p95 latency,
+# throughput, peak RSS) go to a JSON file; --compare prints p50 ratios against
+# an earlier run.
+#
+#   cd backend && python benchmarks/bench_pipeline.py --sizes 1000 10000 --out before.json
+#   cd backend && python benchmarks/bench_pipeline.py --sizes 1000 10000 --compare before.json
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import git_revision, install_fake_model, make_corpus, measure, peak_rss_mb
+
+from absa_cache import ABSAResultCache, LRUTier
+from aggregation_engine import AggregationEngine
+from aggregator import aggregate_aspect_scores
+from analyzer import ABSAService
+from atepc_parser import parse_batch
+from aspect_merge import merge_aspects
+from review_synthesizer import synthesize_review
+from text_preprocess import preprocess_comments
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def bench_size(n, args, fake):
+    corpus = make_corpus(n, seed=args.seed)
+    stages = {}
+
+    def run(name, fn, items, setup=None):
+        stages[name], out = measure(fn, items, args.repeat, setup)
+        return out
+
+    run("preprocess", lambda: preprocess_comments(corpus), n)
+
+    svc = ABSAService(use_cache=False)
+    if fake is not None:
+        raw = fake.extract_aspect(corpus)
+        run("parse", lambda: [svc._parse_atepc_result(r, source_text=t) for r, t in zip(raw, corpus)], n)
+        run("parse_batch", lambda: parse_batch(raw, corpus), n)
+
+    per_text = run("analyze_batch", lambda: svc.analyze_batch(corpus), n)
+
+    cached = ABSAService(cache=ABSAResultCache(LRUTier(max(n, 1))))
+    cached.analyze_batch(corpus)
+    run("analyze_batch_cached", lambda: cached.analyze_batch(corpus), n)
+
+    rows = [it for items in per_text for it in items]
+    aspect_list = run("merge_aspects", lambda: merge_aspects(rows), len(rows))
+    run("synthesize_review", lambda: synthesize_review(aspect_list), len(aspect_list))
+    run("aggregate_aspect_scores", lambda: aggregate_aspect_scores(rows), len(rows))
+
+    def fused():
+        engine = AggregationEngine()
+        engine.add(rows)
+        return engine.result()
+    result = run("fused_engine", fused, len(rows))
+    run("serialize", lambda: json.dumps(result), len(rows))
+
+    def end_to_end():
+        engine = AggregationEngine()
+        for start in range(0, n, args.read_batch):
+            engine.add_batch(svc.analyze_batch_compact(corpus[start:start + args.read_batch]))
+        return json.dumps(engine.result())
+    e2e, _ = measure(end_to_end, n, args.repeat)
+
+    return {
+        "comments": n,
+        "aspect_rows": len(rows),
+        "distinct_aspects": len(aspect_list),
+        "stages": stages,
+        "end_to_end": e2e,
+    }
+
+
+def compare(report, previous):
+    print(f"\np50 vs {previous['meta'].get('revision')} ({previous['meta'].get('timestamp')}); <1 is faster")
+    for size, now in report["sizes"].items():
+        before = previous.get("sizes", {}).get(size)
+        if before is None:
+            continue
+        print(f"  {size} comments")
+        pairs = [(name, st, before["stages"].get(name)) for name, st in now["stages"].items()]
+        pairs.append(("end_to_end", now["end_to_end"], before.get("end_to_end")))
+        for name, st, old in pairs:
+            if old and old["p50_ms"]:
+                print(f"    {name:24s} {old['p50_ms']:10.2f} -> {st['p50_ms']:10.2f} ms  x{st['p50_ms'] / old['p50_ms']:.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 50000])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--read-batch", type=int, default=500, help="reviews per cursor batch in end_to_end")
+    ap.add_argument("--model-latency-ms", type=float, default=0.0, help="simulated per-text cost of the fake model")
+    ap.add_argument("--real-model", action="store_true", help="load the configured ATEPC checkpoint instead")
+    ap.add_argument("--out", help="JSON output path (default: benchmarks/results/pipeline-<rev>-<time>.json)")
+    ap.add_argument("--compare", help="earlier JSON result to compare against")
+    args = ap.parse_args()
+
+    fake = None if args.real_model else install_fake_model(args.model_latency_ms)
+    if args.real_model:
+        ABSAService().warm_up()
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "model": "real" if args.real_model else "fake",
+            "args": vars(args),
+        },
+        "sizes": {},
+    }
+    for n in args.sizes:
+        report["sizes"][str(n)] = entry = bench_size(n, args, fake)
+        e2e = entry["end_to_end"]
+        print(f"{n:>8,} comments  end-to-end p50 {e2e['p50_ms']:9.1f} ms  p95 {e2e['p95_ms']:9.1f} ms  "
+              f"{e2e['items_per_sec']:>10,.0f}/s  peak RSS {e2e['peak_rss_mb']} MB")
+        for name, st in entry["stages"].items():
+            print(f"    {name:24s} p50 {st['p50_ms']:9.2f} ms  p95 {st['p95_ms']:9.2f} ms  {st['items_per_sec'] or 0:>12,.0f}/s")
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"pipeline-{report['meta']['revision']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# eval_prefilter.py
+# Offline recall check for the model-free pre-filter: runs the model on every
+# comment, then reports per strictness level how many comments would have been
+# skipped and how much of the model's output that would have lost (comments
+# with aspects, aspect rows, rows that map to a category), with examples of
+# lost comments. Uses the configured checkpoint on real reviews from MongoDB
+# (--course) or a text file (--file), or the fake extractor on a synthetic
+# corpus. Exits 1 when a level's aspect-row recall falls below --min-recall.
+#
+#   cd backend && python benchmarks/eval_prefilter.py --course <video_id> [--limit 2000]
+#   cd backend && python benchmarks/eval_prefilter.py --synthetic 5000
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import install_fake_model, make_corpus
+
+from analyzer import ABSAService
+from prefilter import LEVELS, evaluate
+
+
+def load_texts(args):
+    if args.course:
+        from db_client import get_reviews
+        return [r.get("text") or "" for r in get_reviews("reviews", {"course_id": args.course}, limit=args.limit)]
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            return [line.rstrip("\n") for line in f if line.strip()]
+    install_fake_model()
+    return make_corpus(args.synthetic, seed=args.seed)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    source = ap.add_mutually_exclusive_group()
+    source.add_argument("--course", help="evaluate on this course's stored reviews (real model)")
+    source.add_argument("--file", help="evaluate on one comment per line (real model)")
+    source.add_argument("--synthetic", type=int, default=2000, help="synthetic corpus size (fake model)")
+    ap.add_argument("--limit", type=int, default=0, help="max reviews read with --course (0 = all)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--levels", nargs="+", default=list(LEVELS[1:]), choices=LEVELS[1:])
+    ap.add_argument("--min-recall", type=float, default=0.0, help="fail when aspect-row recall is lower")
+    ap.add_argument("--out", help="also write the JSON report here")
+    args = ap.parse_args()
+
+    texts = load_texts(args)
+    report = evaluate(ABSAService(use_cache=False, prefilter="off"), texts, args.levels)
+
+    base = report["baseline"]
+    print(f"{report['comments']:,} comments; model on everything: {base['comments_with_aspects']:,} with aspects, "
+          f"{base['aspect_rows']:,} aspect rows, {base['category_rows']:,} in a category")
+    failed = False
+    for level, r in report["levels"].items():
+        print(f"  {level:13s} skips {r['skipped']:>7,} ({r['skip_rate']:6.1%})  recall: "
+              f"comments {r['comments_with_aspects_recall']:.4f}  rows {r['aspect_rows_recall']:.4f}  "
+              f"category rows {r['category_rows_recall']:.4f}")
+        for text in r["lost_examples"][:3]:
+            print(f"      lost: {text[:80]!r}")
+        failed |= r["aspect_rows_recall"] < args.min_recall
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nwrote {args.out}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
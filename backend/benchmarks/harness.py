@@ -0,0 +1,138 @@
+# harness.py
+# Shared pieces for the pipeline benchmarks: a seeded synthetic comment corpus,
+# a deterministic stand-in for the ATEPC extractor (so everything except the
+# model can be measured offline), and timing / memory helpers.
+import hashlib
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from review_synthesizer import ASPECT_KEYWORDS
+
+_OPENERS = ["", "Honestly, ", "Overall ", "Sir, ", "Madam, ", "Wow, ", "I think "]
+_PRAISE = ["is great", "was really clear", "helped me a lot", "is excellent", "is well organized"]
+_COMPLAINTS = ["is terrible", "was confusing", "is too fast", "could be better", "is outdated"]
+_FILLER = ["Thanks for sharing.", "Watching from India.", "Subscribed!", "Day 3 of learning.", "first"]
+_EMOJI = ["😀", "🔥🔥", "👍", "❤️❤️❤️", "🙏"]
+
+
+def make_comment(rnd: random.Random, keywords) -> str:
+    roll = rnd.random()
+    if roll < 0.05:
+        return rnd.choice(_EMOJI)
+    if roll < 0.15:
+        return rnd.choice(_FILLER)
+    sentences = []
+    # mostly short comments, with a long tail of multi-sentence essays
+    n_sentences = 1 if roll < 0.7 else rnd.randint(2, 4) if roll < 0.95 else rnd.randint(8, 20)
+    for _ in range(n_sentences):
+        verdict = rnd.choice(_PRAISE if rnd.random() < 0.65 else _COMPLAINTS)
+        sentences.append(f"{rnd.choice(_OPENERS)}the {rnd.choice(keywords)} {verdict}.")
+    return " ".join(s[0].upper() + s[1:] for s in sentences)
+
+
+def make_corpus(n: int, seed: int = 0, duplicate_rate: float = 0.1):
+    """`n` synthetic YouTube-style comments; about `duplicate_rate` repeat earlier ones."""
+    rnd = random.Random(seed)
+    keywords = [kw for kws in ASPECT_KEYWORDS.values() for kw in kws]
+    corpus = []
+    for _ in range(n):
+        if corpus and rnd.random() < duplicate_rate:
+            corpus.append(rnd.choice(corpus))
+        else:
+            corpus.append(make_comment(rnd, keywords))
+    return corpus
+
+
+class FakeExtractor:
+    """
+    Deterministic stand-in for pyabsa's aspect extractor: the same text always
+    yields the same aspects (vocabulary words), sentiments and confidences, in
+    the raw result shape `_parse_atepc_result` expects. `latency_ms` adds a
+    simulated per-text model cost.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.vocab = {kw for kws in ASPECT_KEYWORDS.values() for kw in kws if " " not in kw}
+        self.calls = 0
+
+    def _one(self, text: str):
+        aspects, sentiments, confidences = [], [], []
+        for word in text.split():
+            w = word.strip(".,!?").lower()
+            if w in self.vocab:
+                h = hashlib.md5(f"{text}|{w}".encode("utf-8")).digest()
+                aspects.append(w)
+                sentiments.append(("Positive", "Negative", "Neutral")[h[0] % 3])
+                confidences.append(round(0.5 + h[1] / 510, 4))
+        return {"sentence": text, "aspect": aspects, "sentiment": sentiments, "confidence": confidences}
+
+    def extract_aspect(self, inference_source, pred_sentiment=True, save_result=False, **kwargs):
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms * len(inference_source) / 1000)
+        return [self._one(t) for t in inference_source]
+
+
+def install_fake_model(latency_ms: float = 0.0) -> FakeExtractor:
+    """Makes every ABSAService use the fake extractor instead of loading pyabsa."""
+    from analyzer import ABSAService
+    fake = FakeExtractor(latency_ms)
+    ABSAService._classifier = fake
+    ABSAService._backend = "fake"
+    ABSAService._state = "ready"
+    return fake
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def measure(fn, items: int, repeat: int = 5, setup=None):
+    """
+    Runs `fn` `repeat` times (after `setup`, untimed, if given) and returns
+    (stats, last result) with p50/p95/min in ms and throughput at the median.
+    """
+    timings, out = [], None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        out = fn()
+        timings.append(time.perf_counter() - started)
+    p50 = percentile(timings, 0.5)
+    return {
+        "items": items,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+        "items_per_sec": round(items / p50, 1) if p50 else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }, out
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
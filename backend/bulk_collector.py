@@ -0,0 +1,194 @@
+# bulk_collector.py
+# Collects comments for many videos at once (a playlist's worth of URLs or
+# video ids). Videos are fetched concurrently on one asyncio loop over a shared
+# aiohttp connection pool; a semaphore bounds how many videos are in flight and
+# a process-wide token bucket bounds API requests per second across all
+# concurrent batches, so they stay inside quota together. Each page is stored
+# with one bulk upsert, run off the event loop.
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from collector import extract_video_id, parse_comment_page, review_doc
+from config import YOUTUBE_API_KEY
+from db_client import insert_reviews
+from ingest_analysis import backfill_in_background
+from settings import (
+    YOUTUBE_API_BASE,
+    YOUTUBE_PAGE_SIZE,
+    YOUTUBE_HTTP_RETRIES,
+    YOUTUBE_HTTP_BACKOFF,
+    YOUTUBE_HTTP_TIMEOUT,
+    BULK_COLLECT_CONCURRENCY,
+    BULK_COLLECT_RATE,
+)
+
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RateLimiter:
+    """
+    Token bucket: at most `rate` acquisitions per second, bursts up to `rate`.
+    Guarded by a thread lock rather than an asyncio one, so batches running on
+    different event loops (one per request thread) share it.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Takes a token, going into debt if needed; returns how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self) -> None:
+        if not self.rate:
+            return
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+_limiter = RateLimiter(BULK_COLLECT_RATE)
+
+
+async def _get_json(session: aiohttp.ClientSession, url: str, params: Dict[str, Any],
+                    limiter: RateLimiter) -> Dict[str, Any]:
+    """
+    GET with the same retry/backoff policy as the synchronous collector:
+    429 / 5xx responses, connection errors and timeouts are retried.
+    """
+    for attempt in range(YOUTUBE_HTTP_RETRIES + 1):
+        await limiter.acquire()
+        try:
+            async with session.get(url, params=params) as response:
+                if response.status == 200:
+                    return await response.json(content_type=None)
+                status, body = response.status, await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == YOUTUBE_HTTP_RETRIES:
+                raise
+        else:
+            if status not in _RETRY_STATUSES or attempt == YOUTUBE_HTTP_RETRIES:
+                raise Exception(f"Failed to fetch comments: {body}")
+        await asyncio.sleep(YOUTUBE_HTTP_BACKOFF * (2 ** attempt))
+
+
+async def _collect_video(session, video_id: str, api_key: str, max_results: int, base_url: str,
+                         limiter: RateLimiter, slots: asyncio.Semaphore) -> Dict[str, Any]:
+    result = {"video_id": video_id, "fetched": 0, "inserted": 0, "error": None}
+    url = f"{base_url.rstrip('/')}/commentThreads"
+    params = {
+        "part": "snippet",
+        "videoId": video_id,
+        "order": "relevance",
+        "textFormat": "plainText",
+        "key": api_key,
+    }
+
+    async with slots:
+        try:
+            remaining = max_results
+            while remaining > 0:
+                params["maxResults"] = min(remaining, YOUTUBE_PAGE_SIZE)
+                data = await _get_json(session, url, params, limiter)
+                page = parse_comment_page(data)[:remaining]
+                if page:
+                    docs = [review_doc(video_id, c) for c in page]
+                    # pymongo is blocking; the other videos keep downloading meanwhile
+                    result["inserted"] += await asyncio.to_thread(insert_reviews, "reviews", docs)
+                    result["fetched"] += len(page)
+                remaining -= len(page)
+
+                token = data.get("nextPageToken")
+                if not token or not page:
+                    break
+                params["pageToken"] = token
+        except Exception as e:
+            # one bad video (deleted, comments disabled) must not sink the batch
+            result["error"] = str(e)
+    return result
+
+
+async def collect_videos(videos: Iterable[str], max_results: int = 50,
+                         api_key: Optional[str] = None, base_url: Optional[str] = None,
+                         concurrency: int = BULK_COLLECT_CONCURRENCY,
+                         limiter: Optional[RateLimiter] = None) -> List[Dict[str, Any]]:
+    """
+    Fetches and stores comments for every URL or video id in `videos`.
+    Returns one {"video_id", "fetched", "inserted", "error"} entry per input,
+    in input order; duplicate videos are collected once. Requests draw from
+    the process-wide rate limiter unless `limiter` is given.
+    """
+    tasks: Dict[str, asyncio.Task] = {}
+
+    limiter = limiter or _limiter
+    slots = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=YOUTUBE_HTTP_TIMEOUT, sock_connect=YOUTUBE_HTTP_TIMEOUT)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        order = []
+        for video in videos:
+            video_id = extract_video_id(video) if isinstance(video, str) else None
+            if not video_id:
+                order.append({"input": video, "video_id": None, "fetched": 0, "inserted": 0,
+                              "error": "Invalid YouTube URL or video id."})
+                continue
+            if video_id not in tasks:
+                tasks[video_id] = asyncio.ensure_future(_collect_video(
+                    session, video_id, api_key or YOUTUBE_API_KEY, max_results,
+                    base_url or YOUTUBE_API_BASE, limiter, slots,
+                ))
+            order.append({"input": video, "video_id": video_id})
+
+        done = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+
+    for entry in order:
+        if entry["video_id"] is not None:
+            entry.update(done[entry["video_id"]])
+    return order
+
+
+def collect_many(videos: Iterable[str], max_results: int = 50, analyze=None, absa=None,
+                 **kwargs) -> Dict[str, Any]:
+    """
+    Synchronous entry point for Flask handlers and jobs. With
+    analyze="background", each video that gained reviews is analyzed on a
+    job (see backfill_in_background) afterwards.
+    """
+    if analyze not in (False, None, "background"):
+        raise ValueError(f"Bulk collection supports analyze=None or 'background', not {analyze!r}")
+
+    started = time.perf_counter()
+    results = asyncio.run(collect_videos(list(videos), max_results, **kwargs))
+
+    if analyze == "background":
+        if absa is None:
+            from analyzer import ABSAService
+            absa = ABSAService()
+        queued = {}
+        for r in results:
+            if r["inserted"] and r["video_id"] not in queued:
+                queued[r["video_id"]] = backfill_in_background(absa, r["video_id"]).id
+            if r["video_id"] in queued:
+                r["analysis_job"] = queued[r["video_id"]]
+
+    per_video = {r["video_id"]: r for r in results if r["video_id"]}
+    return {
+        "videos": results,
+        "fetched": sum(r["fetched"] for r in per_video.values()),
+        "inserted": sum(r["inserted"] for r in per_video.values()),
+        "errors": sum(1 for r in results if r["error"]),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
@@ -1,62 +1,230 @@
+import queue
 import re
+import threading
 import requests
 from datetime import datetime
-from db_client import insert_review
+from typing import Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from db_client import insert_reviews
 from config import YOUTUBE_API_KEY
+from settings import (
+    ANALYZE_ON_INGEST,
+    YOUTUBE_API_BASE,
+    YOUTUBE_PAGE_SIZE,
+    YOUTUBE_HTTP_RETRIES,
+    YOUTUBE_HTTP_BACKOFF,
+    YOUTUBE_HTTP_TIMEOUT,
+    YOUTUBE_PREFETCH_PAGES,
+)
+from ingest_analysis import backfill_in_background, row_analysis_fields
+from metrics import log_event
+
+
+_bare_id = re.compile(r"[A-Za-z0-9_-]{11}")
 
 
 def extract_video_id(url: str):
-    """Extracts videoId from a YouTube URL."""
-    match = re.search(r"(?:v=|youtu\.be/|embed/)([^&?/]+)", url)
+    """Extracts videoId from a YouTube URL; a bare 11-character video id is returned as-is."""
+    url = url.strip()
+    if _bare_id.fullmatch(url):
+        return url
+    match = re.search(r"(?:v=|youtu\.be/|embed/|shorts/)([^&?/]+)", url)
     return match.group(1) if match else None
 
 
-def fetch_top_comments(video_url: str, api_key: str, max_results: int = 50):
-    """Fetches top (most relevant) YouTube comments as plain text strings."""
-    video_id = extract_video_id(video_url)
-    if not video_id:
-        raise ValueError("Invalid YouTube URL provided.")
+def parse_comment_page(data: dict):
+    """commentThreads response -> list of {"comment_id", "text"} dicts."""
+    return [
+        {
+            "comment_id": item.get("id"),
+            "text": item["snippet"]["topLevelComment"]["snippet"]["textDisplay"],
+        }
+        for item in data.get("items", [])
+    ]
+
+
+def review_doc(video_id: str, comment: dict) -> dict:
+    return {
+        "source": "youtube",
+        "course_id": video_id,  # using the videoId as course_id
+        "comment_id": comment["comment_id"],
+        "text": comment["text"],
+        "created_at": datetime.utcnow()
+    }
+
+
+_session = None
+_session_lock = threading.Lock()
 
-    url = "https://www.googleapis.com/youtube/v3/commentThreads"
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session with retry/backoff on throttling and 5xx responses."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=YOUTUBE_HTTP_RETRIES,
+                    backoff_factor=YOUTUBE_HTTP_BACKOFF,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=("GET",),
+                    raise_on_status=False,
+                )
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def iter_comment_pages(video_id: str, api_key: str, max_results: int = 50,
+                       session: Optional[requests.Session] = None,
+                       base_url: Optional[str] = None):
+    """
+    Yields pages of top-level comments as lists of {"comment_id", "text"} dicts,
+    following nextPageToken until `max_results` comments have been returned.
+    """
+    session = session or get_session()
+    url = f"{(base_url or YOUTUBE_API_BASE).rstrip('/')}/commentThreads"
     params = {
         "part": "snippet",
         "videoId": video_id,
-        "maxResults": max_results,
         "order": "relevance",      # 'relevance' = top comments
         "textFormat": "plainText",
         "key": api_key
     }
 
-    response = requests.get(url, params=params)
-    if response.status_code != 200:
-        raise Exception(f"Failed to fetch comments: {response.text}")
+    remaining = max_results
+    while remaining > 0:
+        params["maxResults"] = min(remaining, YOUTUBE_PAGE_SIZE)
+        response = session.get(url, params=params, timeout=YOUTUBE_HTTP_TIMEOUT)
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch comments: {response.text}")
 
-    data = response.json()
-    comments = [
-        item["snippet"]["topLevelComment"]["snippet"]["textDisplay"]
-        for item in data.get("items", [])
-    ]
+        data = response.json()
+        page = parse_comment_page(data)[:remaining]
+        if page:
+            yield page
+        remaining -= len(page)
+
+        token = data.get("nextPageToken")
+        if not token or not page:
+            break
+        params["pageToken"] = token
+
+
+def prefetch(iterable, depth: int = YOUTUBE_PREFETCH_PAGES):
+    """
+    Drains `iterable` on a helper thread, keeping up to `depth` items buffered,
+    so the consumer can work on one page while the next is downloading.
+    """
+    if depth <= 0:
+        yield from iterable
+        return
+
+    buf = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            it = iter(iterable)
+            # check before fetching, so an abandoned stream doesn't cost one more page
+            while not stop.is_set():
+                item = next(it, done)
+                buf.put(item)
+                if item is done:
+                    return
+        except Exception as e:
+            buf.put(e)
+
+    threading.Thread(target=produce, name="comment-prefetch", daemon=True).start()
+    try:
+        while True:
+            item = buf.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # unblock a producer waiting on a full buffer
+        while not buf.empty():
+            buf.get_nowait()
+
+
+def iter_top_comments(video_url: str, api_key: str, max_results: int = 50, **kwargs):
+    """Streams top (most relevant) YouTube comments as plain text strings."""
+    video_id = extract_video_id(video_url)
+    if not video_id:
+        raise ValueError("Invalid YouTube URL provided.")
+    for page in iter_comment_pages(video_id, api_key, max_results, **kwargs):
+        for c in page:
+            yield c["text"]
+
+
+def fetch_top_comments(video_url: str, api_key: str, max_results: int = 50, **kwargs):
+    """Fetches top (most relevant) YouTube comments as plain text strings."""
+    video_id = extract_video_id(video_url)
+    if not video_id:
+        raise ValueError("Invalid YouTube URL provided.")
+
+    comments = list(iter_top_comments(video_url, api_key, max_results, **kwargs))
     return comments, video_id
 
 
-def fetch_and_store_comments(video_url: str, max_results: int = 50):
+def fetch_and_store_comments(video_url: str, max_results: int = 50, analyze=None, absa=None):
     """
     Fetches YouTube comments and stores them in MongoDB using videoId as course_id.
+
+    `analyze` (default: settings.ANALYZE_ON_INGEST) controls ingest-time analysis:
+    "inline" (or True) stores parsed aspects on each review before returning,
+    "background" stores raw text and queues an ("analyze", course_id) job.
     """
-    comments, video_id = fetch_top_comments(video_url, YOUTUBE_API_KEY, max_results)
-
-    print(f"Fetched {len(comments)} comments for video {video_id}, inserting into DB...")
-    for text in comments:
-        doc = {
-            "source": "youtube",
-            "course_id": video_id,  # using the videoId as course_id
-            "text": text,
-            "created_at": datetime.utcnow()
-        }
-        insert_review("reviews", doc)
+    if analyze is None:
+        analyze = ANALYZE_ON_INGEST
+    if analyze is True:
+        analyze = "inline"
+    if analyze not in (False, None, "inline", "background"):
+        raise ValueError(f"Unknown analyze mode: {analyze!r}")
+
+    video_id = extract_video_id(video_url)
+    if not video_id:
+        raise ValueError("Invalid YouTube URL provided.")
+
+    if analyze and absa is None:
+        from analyzer import ABSAService  # heavy import, only when analysis is requested
+        absa = ABSAService()
+
+    # pages are stored (and analyzed) as they arrive while the next one downloads
+    count = 0
+    inserted = 0
+    pages = iter_comment_pages(video_id, YOUTUBE_API_KEY, max_results)
+    for page in prefetch(pages):
+        texts = [c["text"] for c in page]
+        analyses = absa.analyze_batch_rows(texts) if analyze == "inline" else None
+
+        docs = []
+        for i, c in enumerate(page):
+            doc = review_doc(video_id, c)
+            if analyses is not None:
+                doc.update(row_analysis_fields(analyses[i], absa.result_tag))
+            docs.append(doc)
+
+        # one unordered bulk upsert per page; already-stored comments are skipped
+        inserted += insert_reviews("reviews", docs)
+        count += len(page)
+        log_event("collect.page", video_id=video_id, fetched=count, inserted=inserted)
+
+    log_event("collect.done", video_id=video_id, fetched=count, inserted=inserted)
+
+    if analyze == "background":
+        backfill_in_background(absa, video_id)
 
-    print(f"Inserted {len(comments)} comments for video {video_id}.")
-    return video_id, len(comments)
+    return video_id, count
 
 
 if __name__ == "__main__":
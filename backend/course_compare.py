@@ -0,0 +1,91 @@
+# course_compare.py
+# Side-by-side analysis of several courses. Their reviews are read together
+# (one $in query, or one capped cursor per course under a limit) and go through
+# the model in shared batches, so a comment that appears under more than one
+# course is analyzed once; the rows are then fanned back out into one
+# AggregationEngine per course. `category_table` lines the per-course
+# category scores up for comparison.
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional
+
+from aggregation_engine import AggregationEngine
+from db_client import iter_review_batches, REVIEW_ANALYSIS_PROJECTION
+from ingest_analysis import analyze_reviews_grouped
+from metrics import timed, timed_iter
+
+COMPARE_PROJECTION = dict(REVIEW_ANALYSIS_PROJECTION, course_id=1)
+
+
+def _review_chunks(course_ids: List[str], limit: Optional[int], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Every course's reviews in chunks of `batch_size`. With a `limit`, each
+    course is read by its own capped cursor (what the per-course endpoint
+    reads) and the reads are chained, so a small or empty course never makes
+    the scan run through the other courses' surplus reviews.
+    """
+    if not limit:
+        yield from iter_review_batches("reviews", {"course_id": {"$in": course_ids}}, batch_size=batch_size,
+                                       projection=COMPARE_PROJECTION)
+        return
+    pending: List[Dict[str, Any]] = []
+    for course_id in course_ids:
+        for chunk in iter_review_batches("reviews", {"course_id": course_id}, batch_size=batch_size,
+                                         limit=limit, projection=COMPARE_PROJECTION):
+            pending.extend(chunk)
+            while len(pending) >= batch_size:
+                yield pending[:batch_size]
+                pending = pending[batch_size:]
+    if pending:
+        yield pending
+
+
+def compare_courses(absa, course_ids: List[str], limit: Optional[int] = None, batch_size: int = 500,
+                    persist: bool = False, stats=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Analyzes every course in `course_ids` in shared inference batches.
+    Returns {course_id: {"raw_count", "result"}} in request order, where
+    `result` is AggregationEngine.result() (None for a course with no reviews).
+    """
+    course_ids = list(dict.fromkeys(course_ids))
+    engines = {course_id: AggregationEngine() for course_id in course_ids}
+    counts = Counter()
+
+    for chunk in timed_iter(_review_chunks(course_ids, limit, batch_size), "fetch"):
+        grouped = analyze_reviews_grouped(absa, chunk, persist=persist, stats=stats)
+        with timed("fold", items=len(chunk)):
+            for course_id, batch in grouped.items():
+                engines[course_id].add_batch(batch)
+            counts.update(doc.get("course_id") for doc in chunk)
+
+    return {
+        course_id: {
+            "raw_count": counts[course_id],
+            "result": engines[course_id].result() if counts[course_id] else None,
+        }
+        for course_id in course_ids
+    }
+
+
+def category_table(categories: Dict[str, Dict[str, Dict[str, float]]]) -> List[Dict[str, Any]]:
+    """
+    One row per category found in any course: each course's score (None when
+    the course has no aspects in it) and aspect count, and the courses that
+    have a score ranked best first (ties keep request order).
+    """
+    names = sorted({name for per_course in categories.values() for name in per_course})
+    table = []
+    for name in names:
+        scores, counts = {}, {}
+        for course_id, per_course in categories.items():
+            entry = per_course.get(name)
+            scores[course_id] = entry["score"] if entry else None
+            counts[course_id] = entry["count"] if entry else 0
+        ranking = sorted((c for c, s in scores.items() if s is not None), key=lambda c: -scores[c])
+        table.append({
+            "category": name,
+            "scores": scores,
+            "counts": counts,
+            "ranking": ranking,
+            "best": ranking[0] if ranking else None,
+        })
+    return table
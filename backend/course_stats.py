@@ -0,0 +1,183 @@
+# course_stats.py
+# Running sufficient statistics per course so a refresh only analyzes the
+# reviews added since the last one. The merged aspect list, category scores and
+# aggregate are all rebuilt from these stats without touching older reviews.
+#
+# New reviews are found by their per-course `seq` (see reserve_review_seq).
+# Numbers are reserved before the insert commits, so a refresh also re-reads
+# the last COURSE_STATS_SEQ_OVERLAP numbers below its watermark and skips the
+# reviews it already folded.
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+from aspect_merge import accumulate_aspects, finalize_aspects
+from aggregator import accumulate_aggregate, finalize_aggregate
+from db_client import get_db, get_review_epoch, iter_review_batches, REVIEW_ANALYSIS_PROJECTION
+from ingest_analysis import analyze_reviews
+from metrics import timed_iter, log_event
+from settings import ANALYZE_ON_INGEST, COURSE_STATS_COLLECTION, COURSE_STATS_SEQ_OVERLAP, REVIEW_READ_BATCH
+
+STATS_PROJECTION = dict(REVIEW_ANALYSIS_PROJECTION, seq=1)
+
+
+class CourseStats:
+    """
+    Per-aspect [signed_sum, count] in first-seen order (what merge_aspects
+    needs), the global signed total / count (what aggregate_aspect_scores
+    needs), plus the number of reviews folded in, the highest review seq
+    folded (the watermark) and the [seq, _id] of folded reviews within the
+    overlap below it. `generation` counts saves, for compare-and-swap.
+    """
+
+    def __init__(self, course_id: str, checkpoint: str, epoch=None):
+        self.course_id = course_id
+        self.checkpoint = checkpoint
+        self.epoch = epoch
+        self.aspects: Dict[Any, List[float]] = {}
+        self.aggregate = {"total_score": 0.0, "count": 0}
+        self.raw_count = 0
+        self.watermark = None
+        self.recent: List[List[Any]] = []
+        self.generation = 0
+
+    def add(self, analyzed_reviews: List[List[Dict[str, Any]]], reviews: List[Dict[str, Any]] = ()) -> None:
+        """Folds per-review analysis in; the `reviews` it came from advance the watermark."""
+        for items in analyzed_reviews:
+            accumulate_aspects(self.aspects, items)
+            accumulate_aggregate(self.aggregate, items)
+        self.raw_count += len(analyzed_reviews)
+        for review in reviews:
+            seq = review.get("seq")
+            if seq is None:
+                continue
+            self.recent.append([seq, review["_id"]])
+            if self.watermark is None or seq > self.watermark:
+                self.watermark = seq
+        if self.watermark is not None:
+            floor = self.watermark - COURSE_STATS_SEQ_OVERLAP
+            self.recent = [r for r in self.recent if r[0] > floor]
+
+    def seen_ids(self) -> set:
+        return {_id for _, _id in self.recent}
+
+    def merged_aspects(self) -> List[Dict[str, Any]]:
+        return finalize_aspects(self.aspects)
+
+    def aggregate_scores(self) -> Dict[str, Any]:
+        return finalize_aggregate(self.aggregate["total_score"], self.aggregate["count"])
+
+    def to_doc(self) -> Dict[str, Any]:
+        # aspects are stored as a list: keys may be None or contain "." / "$"
+        return {
+            "_id": self.course_id,
+            "checkpoint": self.checkpoint,
+            "epoch": self.epoch,
+            "aspects": [[a, s, c] for a, (s, c) in self.aspects.items()],
+            "total_score": self.aggregate["total_score"],
+            "count": self.aggregate["count"],
+            "raw_count": self.raw_count,
+            "watermark": self.watermark,
+            "recent": self.recent,
+            "generation": self.generation,
+            "updated_at": datetime.utcnow(),
+        }
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> "CourseStats":
+        stats = cls(doc["_id"], doc["checkpoint"], doc.get("epoch"))
+        stats.aspects = {a: [s, c] for a, s, c in doc.get("aspects", [])}
+        stats.aggregate = {"total_score": doc.get("total_score", 0.0), "count": doc.get("count", 0)}
+        stats.raw_count = doc.get("raw_count", 0)
+        stats.watermark = doc.get("watermark")
+        stats.recent = doc.get("recent", [])
+        stats.generation = doc.get("generation", 0)
+        return stats
+
+
+_course_locks = defaultdict(threading.Lock)
+
+
+def load_course_stats(course_id: str, checkpoint: str) -> CourseStats:
+    """
+    The stored stats, or empty ones when they were built with another model,
+    against another incarnation of the review counter (wiped reviews restart
+    the sequence), or before reviews carried a seq.
+    """
+    epoch = get_review_epoch(course_id)
+    doc = get_db()[COURSE_STATS_COLLECTION].find_one({"_id": course_id})
+    if doc is None or doc.get("checkpoint") != checkpoint or doc.get("epoch") != epoch \
+            or not doc.get("generation"):
+        return CourseStats(course_id, checkpoint, epoch)
+    return CourseStats.from_doc(doc)
+
+
+def _save_course_stats(stats: CourseStats, previous_generation: int) -> bool:
+    """
+    Writes `stats` only if nobody saved the course since we loaded it, so two
+    workers refreshing the same course never double count.
+    """
+    coll = get_db()[COURSE_STATS_COLLECTION]
+    stats.generation = previous_generation + 1
+    doc = stats.to_doc()
+    if previous_generation == 0:
+        # nothing usable was stored: replace whatever is there unless it is
+        # current stats another worker just wrote
+        current = {"checkpoint": stats.checkpoint, "epoch": stats.epoch, "generation": {"$gt": 0}}
+        try:
+            coll.replace_one({"_id": stats.course_id, "$nor": [current]}, doc, upsert=True)
+        except DuplicateKeyError:
+            return False
+        return True
+    res = coll.replace_one({"_id": stats.course_id, "generation": previous_generation}, doc)
+    return res.matched_count == 1
+
+
+def refresh_course_stats(absa, course_id: str, collection: str = "reviews",
+                         on_batch=None) -> CourseStats:
+    """
+    Brings the stored stats for `course_id` up to date by analyzing only the
+    reviews past the watermark, a batch at a time. Cost is O(new reviews).
+    """
+    with _course_locks[course_id]:
+        for _ in range(3):
+            stats = load_course_stats(course_id, absa.result_tag)
+            previous = stats.generation
+
+            q = {"course_id": course_id}
+            if stats.watermark is not None:
+                q["seq"] = {"$gt": stats.watermark - COURSE_STATS_SEQ_OVERLAP}
+            seen = stats.seen_ids()
+            batches = iter_review_batches(collection, q, batch_size=REVIEW_READ_BATCH, projection=STATS_PROJECTION,
+                                          sort=[("seq", ASCENDING), ("_id", ASCENDING)])
+            folded = 0
+            for batch in timed_iter(batches, "fetch"):
+                new_reviews = [r for r in batch if r["_id"] not in seen]
+                if not new_reviews:
+                    continue
+
+                def progress(done, total, base=folded):
+                    on_batch(base + done, base + total)
+                analyzed = analyze_reviews(
+                    absa, new_reviews, collection=collection,
+                    persist=bool(ANALYZE_ON_INGEST), on_batch=progress if on_batch is not None else None,
+                )
+                stats.add(analyzed, new_reviews)
+                folded += len(new_reviews)
+            if not folded:
+                return stats
+            if stats.watermark is None:
+                # older reviews carry no seq and are only read by this first full pass
+                stats.watermark = 0
+
+            if _save_course_stats(stats, previous):
+                log_event("course_stats.refreshed", course_id=course_id, folded=folded,
+                          raw_count=stats.raw_count, watermark=stats.watermark)
+                return stats
+            # another worker saved the stats first; reload and retry
+
+        return load_course_stats(course_id, absa.result_tag)
@@ -1,5 +1,17 @@
-from pymongo import MongoClient
+import hashlib
+import logging
+import uuid
+from collections import Counter
+from pymongo import MongoClient, UpdateOne, ASCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError
 from config import MONGO_URI, DB_NAME
+from metrics import log_event
+from settings import (
+    COURSE_STATS_COLLECTION,
+    REVIEW_VERSION_COLLECTION,
+    TRANSCRIPT_COLLECTION,
+    TRANSCRIPT_ANALYSIS_COLLECTION,
+)
 
 _client = None
 _db = None
@@ -15,11 +27,184 @@ def get_db():
 
 def insert_review(collection, doc):
     db = get_db()
-    return db[collection].insert_one(doc).inserted_id
+    doc = dict(doc, seq=reserve_review_seq(doc.get("course_id")))
+    inserted_id = db[collection].insert_one(doc).inserted_id
+    bump_review_version(doc.get("course_id"))
+    return inserted_id
 
-def get_reviews(collection, q={}, limit=100):
+def bump_review_version(course_id, count=1):
+    """Marks the review set of `course_id` as changed, invalidating cached responses."""
+    if course_id is None or count <= 0:
+        return
+    try:
+        get_db()[REVIEW_VERSION_COLLECTION].update_one(
+            {"_id": course_id},
+            {"$inc": {"version": count}, "$setOnInsert": {"epoch": uuid.uuid4().hex}},
+            upsert=True,
+        )
+    except Exception as e:
+        log_event("review_version.bump_failed", logging.WARNING, course_id=course_id, error=str(e))
+
+def reserve_review_seq(course_id, count=1):
+    """
+    Reserves `count` consecutive numbers of `course_id`'s review sequence and
+    returns the first. Reviews are stamped with one as they are inserted, so
+    the per-course order is assigned by the server, not by the writer's clock.
+    """
+    doc = get_db()[REVIEW_VERSION_COLLECTION].find_one_and_update(
+        {"_id": course_id},
+        {"$inc": {"seq": count}, "$setOnInsert": {"epoch": uuid.uuid4().hex}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["seq"] - count + 1
+
+def get_review_epoch(course_id):
+    """Epoch of `course_id`'s version counter (None before its first review)."""
+    doc = get_db()[REVIEW_VERSION_COLLECTION].find_one({"_id": course_id}, {"epoch": 1})
+    return doc.get("epoch") if doc else None
+
+def get_review_version(course_id):
+    """
+    Opaque version string of `course_id`'s review set. The epoch is new each
+    time the counter document is created, so a wiped database never reuses
+    an old version.
+    """
+    doc = get_db()[REVIEW_VERSION_COLLECTION].find_one({"_id": course_id})
+    if doc is None:
+        return "0"
+    return f"{doc.get('epoch', '')}.{doc.get('version', 0)}"
+
+def get_review_versions(course_ids):
+    """get_review_version for several courses with one query, in `course_ids` order."""
+    docs = get_db()[REVIEW_VERSION_COLLECTION].find({"_id": {"$in": list(course_ids)}})
+    found = {doc["_id"]: f"{doc.get('epoch', '')}.{doc.get('version', 0)}" for doc in docs}
+    return [found.get(course_id, "0") for course_id in course_ids]
+
+def review_dedupe_key(doc):
+    """YouTube comment id when known, otherwise a hash of the stripped text."""
+    if doc.get("comment_id"):
+        return f"yt:{doc['comment_id']}"
+    text = (doc.get("text") or "").strip()
+    return "sha1:" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def insert_reviews(collection, docs):
+    """
+    Bulk-inserts review docs in one unordered write. Each doc is upserted on
+    (course_id, dedupe_key), so collecting the same video twice stores nothing
+    new. Returns the number of newly inserted reviews.
+    """
+    if not docs:
+        return 0
+    db = get_db()
+    next_seq = {
+        course_id: reserve_review_seq(course_id, n)
+        for course_id, n in Counter(doc.get("course_id") for doc in docs).items()
+    }
+    ops = []
+    for doc in docs:
+        key = review_dedupe_key(doc)
+        on_insert = {k: v for k, v in doc.items() if k not in ("course_id", "dedupe_key")}
+        # duplicates leave their number unused; only the order matters
+        on_insert["seq"] = next_seq[doc.get("course_id")]
+        next_seq[doc.get("course_id")] += 1
+        ops.append(UpdateOne(
+            {"course_id": doc.get("course_id"), "dedupe_key": key},
+            {"$setOnInsert": on_insert},
+            upsert=True,
+        ))
+    try:
+        upserted = list(db[collection].bulk_write(ops, ordered=False).upserted_ids)
+    except BulkWriteError as e:
+        # concurrent collections of the same video can race on the unique index;
+        # those duplicates are exactly what we want to drop
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+        upserted = [u["index"] for u in e.details.get("upserted", [])]
+
+    for course_id, n in Counter(docs[i].get("course_id") for i in upserted).items():
+        bump_review_version(course_id, n)
+    return len(upserted)
+
+def ensure_indexes():
+    """Creates the review indexes; safe to call on every startup."""
+    db = get_db()
+    db["reviews"].create_index([("course_id", ASCENDING)])
+    db["reviews"].create_index([("course_id", ASCENDING), ("seq", ASCENDING)])
+    db["reviews"].create_index(
+        [("course_id", ASCENDING), ("dedupe_key", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"dedupe_key": {"$exists": True}},
+    )
+    db[TRANSCRIPT_COLLECTION].create_index([("video_id", ASCENDING), ("chunk", ASCENDING)], unique=True)
+
+def get_reviews(collection, q={}, limit=100, sort=None):
+    db = get_db()
+    cursor = db[collection].find(q)
+    if sort:
+        cursor = cursor.sort(sort)
+    return list(cursor.limit(limit))
+
+def set_review_fields(collection, updates):
+    """Applies {review _id: fields} as $set updates in a single bulk write."""
+    if not updates:
+        return 0
+    db = get_db()
+    ops = [UpdateOne({"_id": _id}, {"$set": fields}) for _id, fields in updates.items()]
+    return db[collection].bulk_write(ops, ordered=False).modified_count
+
+# fields the analysis pipeline needs from a review: text plus any stored analysis
+REVIEW_ANALYSIS_PROJECTION = {"text": 1, "analysis": 1, "analysis_checkpoint": 1}
+
+def iter_review_batches(collection, q, batch_size=500, limit=None, projection=REVIEW_ANALYSIS_PROJECTION,
+                        sort=None):
+    """
+    Streams matching reviews as lists of at most `batch_size` docs from a
+    batched cursor, so large courses are never fully held in memory.
+    `limit` of None or 0 reads every match.
+    """
+    db = get_db()
+    cursor = db[collection].find(q, projection).batch_size(batch_size)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def insert_transcript_chunks(docs):
+    """Bulk-upserts transcript window docs on (video_id, chunk); returns how many were new."""
+    if not docs:
+        return 0
+    ops = [
+        UpdateOne({"video_id": d["video_id"], "chunk": d["chunk"]}, {"$set": d}, upsert=True)
+        for d in docs
+    ]
+    return get_db()[TRANSCRIPT_COLLECTION].bulk_write(ops, ordered=False).upserted_count
+
+def delete_transcript_chunks(video_id, from_chunk=0):
+    """Drops the windows of `video_id` numbered `from_chunk` and up (left over from a longer earlier run)."""
+    stale = {"video_id": video_id, "chunk": {"$gte": from_chunk}}
+    return get_db()[TRANSCRIPT_COLLECTION].delete_many(stale).deleted_count
+
+def get_transcript_analysis(video_id):
+    return get_db()[TRANSCRIPT_ANALYSIS_COLLECTION].find_one({"_id": video_id})
+
+def set_transcript_analysis(video_id, doc):
+    get_db()[TRANSCRIPT_ANALYSIS_COLLECTION].replace_one({"_id": video_id}, {"_id": video_id, **doc}, upsert=True)
+
+def count_reviews(collection, q, limit=None):
     db = get_db()
-    return list(db[collection].find(q).limit(limit))
+    if limit:
+        return db[collection].count_documents(q, limit=limit)
+    return db[collection].count_documents(q)
 
 def close_db():
     global _client
@@ -32,13 +217,18 @@ def clear_reviews_on_exit():
     """Clear the reviews collection and close the MongoDB client."""
     global _client, _db
     try:
-        if _db:
+        if _db is not None:
             print("\n[INFO] Clearing 'reviews' collection before shutdown...")
             _db["reviews"].delete_many({})
+            _db[COURSE_STATS_COLLECTION].delete_many({})
+            _db[REVIEW_VERSION_COLLECTION].delete_many({})
+            _db[TRANSCRIPT_COLLECTION].delete_many({})
+            _db[TRANSCRIPT_ANALYSIS_COLLECTION].delete_many({})
             print("[INFO] All reviews deleted successfully.")
     except Exception as e:
         print(f"[WARN] Failed to clear reviews: {e}")
     finally:
-        if _client:
+        if _client is not None:
             _client.close()
-            print("[INFO] MongoDB client connection closed.")
\ No newline at end of file
+            print("[INFO] MongoDB client connection closed.")
+        _client = _db = None
\ No newline at end of file
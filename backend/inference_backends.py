@@ -0,0 +1,168 @@
+# inference_backends.py
+# Builds the ATEPC aspect extractor for a configured CPU backend:
+#   "pyabsa" - the stock fp32 torch model from ATEPCCheckpointManager
+#   "int8"   - the same extractor with its Linear layers dynamically quantized
+#   "onnx"   - the same extractor with the model forward served by ONNX Runtime
+# Every backend keeps pyabsa's tokenization and result decoding, so callers see
+# the same extract_aspect interface and result shape.
+import hashlib
+import importlib.util
+import inspect
+import logging
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+from metrics import log_event
+from settings import ONNX_MODEL_DIR
+
+BACKENDS = ("pyabsa", "int8", "onnx")
+
+
+def _stock_extractor(checkpoint: str):
+    from pyabsa import ATEPCCheckpointManager
+    return ATEPCCheckpointManager.get_aspect_extractor(checkpoint)
+
+
+def _model_of(extractor):
+    model = getattr(extractor, "model", None)
+    if model is None:
+        raise RuntimeError("aspect extractor exposes no .model to replace")
+    return model
+
+
+def quantize_int8(extractor):
+    """Swaps the extractor's model for a dynamically int8-quantized copy (Linear layers)."""
+    import torch
+    model = _model_of(extractor).to("cpu").eval()
+    extractor.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return extractor
+
+
+class OnnxModule:
+    """
+    Stands in for the torch model inside the extractor. The first call with a
+    given set of tensor arguments exports the model to ONNX (cached on disk)
+    and later calls run through an ONNX Runtime session. Attribute access
+    falls through to the torch model so pyabsa can still read its config.
+    """
+
+    def __init__(self, model, model_dir: str, name: str):
+        self._model = model.to("cpu").eval()
+        self._params = list(inspect.signature(self._model.forward).parameters)
+        self._model_dir = model_dir
+        self._name = name
+        self._sessions: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        return getattr(self._model, attr)
+
+    # pyabsa moves/flips modes on its model; the session is CPU-only inference
+    def to(self, *args, **kwargs):
+        return self
+
+    def eval(self):
+        return self
+
+    def train(self, mode: bool = True):
+        return self
+
+    def _split_args(self, args, kwargs):
+        import torch
+        bound = dict(zip(self._params, args), **kwargs)
+        tensors = {k: v for k, v in bound.items() if torch.is_tensor(v)}
+        constants = {k: v for k, v in bound.items() if not torch.is_tensor(v)}
+        return tensors, constants
+
+    def _export(self, names, tensors, constants):
+        import torch
+        import onnxruntime as ort
+
+        model = self._model
+
+        class _Wrapper(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.model = model
+
+            def forward(self, *inputs):
+                out = self.model(**dict(zip(names, inputs)), **constants)
+                return tuple(out) if isinstance(out, (list, tuple)) else out
+
+        sample = tuple(tensors[n] for n in names)
+        with torch.no_grad():
+            probe = model(**tensors, **constants)
+        is_tuple = isinstance(probe, (list, tuple))
+
+        os.makedirs(self._model_dir, exist_ok=True)
+        tag = "-".join(names) + "".join(f"-{k}={v}" for k, v in sorted(constants.items()) if v is not None)
+        path = os.path.join(self._model_dir, f"{self._name}.{hashlib.sha1(tag.encode()).hexdigest()[:10]}.onnx")
+        if not os.path.exists(path):
+            dynamic = {n: {d: f"{n}_{d}" for d in range(min(tensors[n].dim(), 2))} for n in names}
+            kwargs = {"input_names": list(names), "dynamic_axes": dynamic, "opset_version": 14}
+            # the TorchScript exporter handles pyabsa's models without onnxscript
+            if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+                kwargs["dynamo"] = False
+            with torch.no_grad():
+                torch.onnx.export(_Wrapper(), sample, path, **kwargs)
+            log_event("onnx.exported", path=path)
+
+        session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        return session, is_tuple
+
+    def __call__(self, *args, **kwargs):
+        import torch
+        tensors, constants = self._split_args(args, kwargs)
+        names = tuple(sorted(tensors))
+        key = (names, tuple(sorted((k, repr(v)) for k, v in constants.items())))
+
+        entry = self._sessions.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._sessions.get(key)
+                if entry is None:
+                    try:
+                        entry = self._export(names, tensors, constants)
+                    except Exception as e:
+                        # never fall back to torch: results would be tagged with the onnx backend
+                        log_event("onnx.export_failed", logging.ERROR, error=str(e))
+                        raise RuntimeError(f"ONNX export failed for {self._name}: {e}") from e
+                    self._sessions[key] = entry
+        session, is_tuple = entry
+
+        feed = {i.name: tensors[i.name].cpu().numpy() for i in session.get_inputs()}
+        outputs = [torch.from_numpy(o) for o in session.run(None, feed)]
+        return tuple(outputs) if is_tuple else outputs[0]
+
+
+def use_onnx(extractor, checkpoint: str, model_dir: str = None):
+    """Routes the extractor's model forward through ONNX Runtime."""
+    # fail fast when the runtime is missing, not on the first forward
+    if importlib.util.find_spec("onnxruntime") is None:
+        raise ImportError("onnxruntime is not installed")
+    name = checkpoint.replace(os.sep, "_")
+    extractor.model = OnnxModule(_model_of(extractor), model_dir or ONNX_MODEL_DIR, name)
+    return extractor
+
+
+def load_extractor(checkpoint: str, backend: str = "pyabsa") -> Tuple[Any, str]:
+    """
+    Returns (extractor, backend). Raises RuntimeError when the requested
+    backend can't be built rather than falling back: results are cached and
+    stored under the backend's tag, so another backend's output must never
+    be served as its own.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}; expected one of {BACKENDS}")
+
+    extractor = _stock_extractor(checkpoint)
+    if backend == "pyabsa":
+        return extractor, backend
+
+    try:
+        if backend == "int8":
+            return quantize_int8(extractor), backend
+        return use_onnx(extractor, checkpoint), backend
+    except Exception as e:
+        raise RuntimeError(f"{backend} inference backend unavailable: {e}") from e
@@ -0,0 +1,142 @@
+# inference_pool.py
+# Pool of worker processes that each load the ATEPC checkpoint once. Used on
+# CPU-only hosts where one in-process model behind the GIL caps throughput at
+# a single core; batches are sharded across workers and gathered in order.
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, List, Optional
+
+# per-process state, set by _init_worker inside each child
+_extractor = None
+_worker_info: Dict[str, Any] = {}
+_barrier = None
+
+
+def _init_worker(checkpoint: str, torch_threads: int, backend: str, barrier) -> None:
+    global _extractor, _barrier
+    _barrier = barrier
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    from inference_backends import load_extractor
+    _extractor, backend = load_extractor(checkpoint, backend)
+    _worker_info.update({"pid": os.getpid(), "checkpoint": checkpoint, "torch_threads": torch_threads,
+                         "backend": backend})
+
+
+def _extract(texts: List[str]) -> List[Any]:
+    return _extractor.extract_aspect(
+        inference_source=texts,
+        pred_sentiment=True,
+        save_result=False
+    )
+
+
+def _ping(timeout: Optional[float]) -> Dict[str, Any]:
+    # hold this worker until every worker has taken a ping, so each answers exactly once
+    _barrier.wait(timeout)
+    return dict(_worker_info, loaded=_extractor is not None)
+
+
+class InferencePool:
+    """
+    Drop-in for the pyabsa aspect extractor: `extract_aspect` splits its input
+    into one contiguous shard per worker and returns results in input order.
+    """
+
+    def __init__(self, checkpoint: str, workers: int, torch_threads: Optional[int] = None,
+                 backend: str = "pyabsa"):
+        self.checkpoint = checkpoint
+        self.backend = backend
+        self.workers = workers
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // workers)
+        # spawn, not fork: the parent runs Flask threads and may hold torch state
+        context = multiprocessing.get_context("spawn")
+        self._barrier = context.Barrier(workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(checkpoint, self.torch_threads, backend, self._barrier),
+        )
+        self._lock = threading.Lock()
+        self._ping_lock = threading.Lock()
+        self._closed = False
+
+    def _shards(self, texts: List[str]) -> List[List[str]]:
+        n = min(self.workers, len(texts))
+        size, extra = divmod(len(texts), n)
+        shards, start = [], 0
+        for i in range(n):
+            end = start + size + (1 if i < extra else 0)
+            shards.append(texts[start:end])
+            start = end
+        return shards
+
+    def extract_aspect(self, inference_source: List[str], pred_sentiment: bool = True,
+                       save_result: bool = False, **kwargs) -> List[Any]:
+        if self._closed:
+            raise RuntimeError("Inference pool is shut down.")
+        if not inference_source:
+            return []
+
+        futures = [self._executor.submit(_extract, shard) for shard in self._shards(list(inference_source))]
+        results: List[Any] = []
+        for f in futures:
+            shard_result = f.result()
+            results.extend(shard_result if isinstance(shard_result, list) else [shard_result])
+        return results
+
+    def _ping_workers(self, timeout: Optional[float]) -> Dict[str, Any]:
+        """One ping per worker process; the first call also starts (and loads) every worker."""
+        with self._ping_lock:
+            seen = {}
+            errors = 0
+            try:
+                futures = [self._executor.submit(_ping, timeout) for _ in range(self.workers)]
+            except RuntimeError:
+                # BrokenProcessPool: a worker died, e.g. its model failed to load
+                futures, errors = [], self.workers
+            for f in futures:
+                try:
+                    info = f.result(timeout=None if timeout is None else timeout * 2)
+                    seen[info.get("pid")] = info
+                except (FutureTimeout, Exception):
+                    errors += 1
+            if errors:
+                # release workers still waiting for the ones that failed to answer
+                self._barrier.reset()
+        loaded = sum(1 for info in seen.values() if info.get("loaded"))
+        return {
+            "status": "ok" if loaded == self.workers and not errors else "degraded",
+            "workers": self.workers,
+            "loaded_workers": loaded,
+            "torch_threads": self.torch_threads,
+            "backends": sorted({info.get("backend") for info in seen.values() if info.get("backend")}),
+            "errors": errors,
+        }
+
+    def wait_ready(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Blocks until every worker has loaded the model; raises if any did not."""
+        health = self._ping_workers(timeout)
+        if health["status"] != "ok":
+            raise RuntimeError(f"Only {health['loaded_workers']} of {self.workers} inference workers loaded.")
+        return health
+
+    def health(self, timeout: float = 5.0) -> Dict[str, Any]:
+        """Pings the pool; "degraded" unless every worker process answered with a loaded model."""
+        if self._closed:
+            return {"status": "shutdown", "workers": self.workers}
+        return self._ping_workers(timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
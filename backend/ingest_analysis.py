@@ -0,0 +1,137 @@
+# ingest_analysis.py
+# Stores parsed ATEPC output on each review document so course analysis can be
+# rebuilt from MongoDB without running the model again.
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+from aspect_batch import AspectBatch, expand_rows
+from db_client import iter_review_batches, set_review_fields
+from jobs import get_job_manager
+from metrics import log_event
+from settings import REVIEW_READ_BATCH
+
+STORED_KEYS = ("aspect", "sentiment", "confidence")
+
+
+def analysis_fields(items: List[Dict[str, Any]], checkpoint: str) -> Dict[str, Any]:
+    """Review document fields holding the compact form of `items`."""
+    return row_analysis_fields([tuple(it.get(k) for k in STORED_KEYS) for it in items], checkpoint)
+
+
+def row_analysis_fields(rows: List[Tuple[Any, str, Any]], checkpoint: str) -> Dict[str, Any]:
+    """analysis_fields for (aspect, sentiment, confidence) rows."""
+    return {
+        "analysis": [{"aspect": a, "sentiment": s, "confidence": c} for a, s, c in rows],
+        "analysis_checkpoint": checkpoint,
+        "analyzed_at": datetime.utcnow(),
+    }
+
+
+def stored_rows(review: Dict[str, Any], checkpoint: str) -> Optional[List[Tuple[Any, str, Any]]]:
+    """
+    (aspect, sentiment, confidence) rows from a review's stored analysis.
+    Returns None when the review was never analyzed or used another checkpoint.
+    """
+    stored = review.get("analysis")
+    if stored is None or review.get("analysis_checkpoint") != checkpoint:
+        return None
+    return [(a.get("aspect"), a.get("sentiment"), a.get("confidence")) for a in stored]
+
+
+def _analyze_rows(absa, reviews, collection, persist, on_batch, stats=None):
+    """Per-review rows: stored analysis where present, the model for the rest."""
+    results = [stored_rows(r, absa.result_tag) for r in reviews]
+    missing = [i for i, rows in enumerate(results) if rows is None]
+    if not missing:
+        return results
+
+    # rows straight from the parser; dicts are only built by callers that return them
+    fresh = absa.analyze_batch_rows([reviews[i].get("text") for i in missing], on_batch=on_batch,
+                                    stats=stats)
+    updates = {}
+    for i, rows in zip(missing, fresh):
+        results[i] = rows
+        if persist and reviews[i].get("_id") is not None:
+            updates[reviews[i]["_id"]] = row_analysis_fields(rows, absa.result_tag)
+
+    if updates:
+        try:
+            set_review_fields(collection, updates)
+        except Exception as e:
+            log_event("analysis.store_failed", logging.WARNING, reviews=len(updates), error=str(e))
+
+    return results
+
+
+def analyze_reviews(absa, reviews: List[Dict[str, Any]], collection: str = "reviews",
+                    persist: bool = True, on_batch=None) -> List[List[Dict[str, Any]]]:
+    """
+    Returns per-review items, reading stored analysis where it exists and running
+    the model only for the remainder. With `persist`, new results are written back.
+    """
+    rows = _analyze_rows(absa, reviews, collection, persist, on_batch)
+    return [expand_rows(r, review.get("text")) for r, review in zip(rows, reviews)]
+
+
+def analyze_reviews_compact(absa, reviews: List[Dict[str, Any]], collection: str = "reviews",
+                            persist: bool = True, on_batch=None, stats=None) -> AspectBatch:
+    """analyze_reviews, returned as a columnar AspectBatch in review order."""
+    batch = AspectBatch()
+    rows_per_review = _analyze_rows(absa, reviews, collection, persist, on_batch, stats)
+    for rows, review in zip(rows_per_review, reviews):
+        batch.extend_rows(review.get("text"), rows)
+    return batch
+
+
+def analyze_reviews_grouped(absa, reviews: List[Dict[str, Any]], key: str = "course_id",
+                            collection: str = "reviews", persist: bool = True, on_batch=None,
+                            stats=None) -> Dict[Any, AspectBatch]:
+    """
+    analyze_reviews_compact for reviews of several groups (e.g. courses) at once:
+    one inference pass over all of them, so a text shared between groups is
+    analyzed once, split into one AspectBatch per `review[key]` in review order.
+    """
+    batches: Dict[Any, AspectBatch] = {}
+    rows_per_review = _analyze_rows(absa, reviews, collection, persist, on_batch, stats)
+    for rows, review in zip(rows_per_review, reviews):
+        batch = batches.get(review.get(key))
+        if batch is None:
+            batch = batches[review.get(key)] = AspectBatch()
+        batch.extend_rows(review.get("text"), rows)
+    return batches
+
+
+def backfill_course_analysis(absa, course_id: str, collection: str = "reviews", job=None) -> int:
+    """
+    Analyzes and stores every review of `course_id` that has no stored analysis
+    yet, a cursor batch at a time. Returns how many reviews were analyzed.
+    """
+    q = {
+        "course_id": course_id,
+        "$or": [
+            {"analysis": {"$exists": False}},
+            {"analysis_checkpoint": {"$ne": absa.result_tag}},
+        ],
+    }
+    done = 0
+    for batch in iter_review_batches(collection, q, batch_size=REVIEW_READ_BATCH, projection={"text": 1}):
+        _analyze_rows(absa, batch, collection, persist=True, on_batch=None)
+        done += len(batch)
+        if job is not None:
+            job.report(analyzed=done)
+    log_event("analysis.backfilled", course_id=course_id, reviews=done)
+    return done
+
+
+def _backfill_job(job, absa, course_id: str, collection: str) -> Dict[str, Any]:
+    return {"course_id": course_id, "analyzed": backfill_course_analysis(absa, course_id, collection, job)}
+
+
+def backfill_in_background(absa, course_id: str, collection: str = "reviews", jobs=None):
+    """
+    Queues backfill_course_analysis as an ("analyze", course_id) job, so a
+    backfill already in flight for the course is joined rather than repeated.
+    Returns the job, pollable at /jobs/<job_id>.
+    """
+    return (jobs or get_job_manager()).submit("analyze", course_id, _backfill_job, absa, course_id, collection)
@@ -0,0 +1,144 @@
+# jobs.py
+# Small in-process job queue so slow collection / analysis work runs on a
+# worker pool instead of inside the Flask request thread.
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from metrics import log_event
+from settings import JOB_WORKERS, JOB_RETENTION
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    def __init__(self, kind: str, key: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.status = QUEUED
+        self.progress: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def report(self, **progress) -> None:
+        """Merges `progress` into the job's progress dict; called from the worker."""
+        with self._lock:
+            self.progress.update(progress)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        with self._lock:
+            out = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "key": self.key,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "created_at": self.created_at.isoformat(),
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            }
+        if self.error is not None:
+            out["error"] = self.error
+        if include_result and self.status == DONE:
+            out["result"] = self.result
+        return out
+
+
+class JobManager:
+    """
+    Runs jobs on a thread pool. Submitting a (kind, key) pair that already has
+    a queued or running job returns that job instead of starting another one.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, retention: int = JOB_RETENTION):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._in_flight: Dict[tuple, str] = {}
+        self._latest: Dict[tuple, str] = {}
+        self._retention = retention
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, key: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """Queues `fn(job, *args, **kwargs)`; returns the job already in flight for (kind, key) if any."""
+        with self._lock:
+            existing = self._in_flight.get((kind, key))
+            if existing is not None:
+                return self._jobs[existing]
+
+            job = Job(kind, key)
+            self._jobs[job.id] = job
+            self._in_flight[(kind, key)] = job.id
+            self._latest[(kind, key)] = job.id
+            self._evict()
+
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs) -> None:
+        job.status = RUNNING
+        job.started_at = datetime.utcnow()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            log_event("job.failed", logging.ERROR, job_id=job.id, kind=job.kind, key=job.key, error=str(e))
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = datetime.utcnow()
+            with self._lock:
+                if self._in_flight.get((job.kind, job.key)) == job.id:
+                    del self._in_flight[(job.kind, job.key)]
+
+    def _evict(self) -> None:
+        # drop the oldest finished jobs once we hold more than `retention`
+        excess = len(self._jobs) - self._retention
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.finished][:excess]:
+            job = self._jobs.pop(job_id)
+            if self._latest.get((job.kind, job.key)) == job_id:
+                del self._latest[(job.kind, job.key)]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self, kind: str, key: str) -> Optional[Job]:
+        """The most recently submitted (kind, key) job, while it is retained."""
+        with self._lock:
+            job_id = self._latest.get((kind, key))
+            return self._jobs.get(job_id) if job_id is not None else None
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_default_manager: Optional[JobManager] = None
+_default_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide job manager shared by the routes and ingest-time analysis; built on first use."""
+    global _default_manager
+    if _default_manager is None:
+        with _default_lock:
+            if _default_manager is None:
+                _default_manager = JobManager()
+    return _default_manager
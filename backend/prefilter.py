@@ -0,0 +1,163 @@
+# prefilter.py
+# Cheap, model-free check for comments that cannot yield an aspect ("first!",
+# "2:35", "thanks sir 🙏", ...), so they skip the ATEPC forward pass. Each
+# strictness level adds rules on top of the previous one:
+#
+#   off           every comment goes to the model
+#   conservative  no letters at all (timestamps, numbers, emoji), or nothing
+#                 but filler words ("first", "thanks", "lol") and timestamps
+#   balanced      also short comments (<= PREFILTER_SHORT_WORDS words) and
+#                 mostly non-Latin comments, unless they mention an
+#                 ASPECT_KEYWORDS term
+#   aggressive    anything that mentions no ASPECT_KEYWORDS term
+#
+# `evaluate` measures what each level would lose against running the model on
+# everything (see benchmarks/eval_prefilter.py).
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from metrics import REGISTRY
+from review_synthesizer import ASPECT_KEYWORDS, map_aspect_category
+from settings import PREFILTER_SHORT_WORDS, PREFILTER_MIN_LATIN
+
+LEVELS = ("off", "conservative", "balanced", "aggressive")
+
+_token = re.compile(r"[^\W_]+(?:['+#][^\W_]*)*")
+_timestamp = re.compile(r"^\d{1,2}(?::\d{2}){1,2}$")
+
+_FILLER = frozenset("""
+    first 1st second 2nd third 3rd early here present again anyone who else watching
+    thanks thank thankyou thx ty tysm tq you u sir mam maam bro bhai dude
+    lol lmao rofl haha hahaha hehe omg wow woah ok okay k yes no yeah yep nah
+    hi hello hey hii hy nice cool great good awesome amazing super superb best love
+    op legend king goat fire lit w l gg done watched subscribed sub like liked
+    from in at the a an and to of my for this is it so very much more
+""".split())
+
+_VOCABULARY = frozenset(
+    word for keywords in ASPECT_KEYWORDS.values() for kw in keywords for word in kw.lower().split()
+)
+
+# "thanks sir" names the instructor, so aspect terms never count as filler
+FILLER = _FILLER - _VOCABULARY
+
+PREFILTER_COMMENTS = REGISTRY.counter(
+    "absa_prefilter_comments_total",
+    "Comments checked by the pre-filter, by strictness and outcome (analyzed, or the rule that skipped them).",
+    ("level", "outcome"),
+)
+
+
+def _mentions_aspect(tokens: List[str]) -> bool:
+    for t in tokens:
+        if t in _VOCABULARY or (t.endswith("s") and t[:-1] in _VOCABULARY):
+            return True
+    return False
+
+
+def _latin_share(text: str) -> float:
+    letters = [ch for ch in text if ch.isalpha()]
+    if not letters:
+        return 0.0
+    return sum(1 for ch in letters if ch < "ɐ") / len(letters)
+
+
+def skip_reason(text: str, level: str) -> Optional[str]:
+    """The rule that routes `text` around the model at `level`, or None to analyze it."""
+    if level == "off" or not text:
+        return None
+    if not any(ch.isalpha() for ch in text):
+        return "no_letters"
+
+    lowered = text.lower()
+    tokens = _token.findall(lowered)
+    if all(t in FILLER or t.isdigit() or _timestamp.match(t) for t in tokens):
+        return "filler"
+    if level == "conservative":
+        return None
+
+    if _mentions_aspect(tokens):
+        return None
+    if level == "aggressive":
+        return "no_keyword"
+    if len(tokens) <= PREFILTER_SHORT_WORDS:
+        return "short"
+    if _latin_share(lowered) < PREFILTER_MIN_LATIN:
+        return "non_latin"
+    return None
+
+
+class PrefilterStats:
+    """Analyzed / skipped counts (skips by rule) for one request or, cumulatively, the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {"analyzed": 0}
+
+    def add(self, counts: Dict[str, int]) -> None:
+        with self._lock:
+            for k, v in counts.items():
+                self._counts[k] = self._counts.get(k, 0) + v
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        return {"analyzed": counts.pop("analyzed"), "filtered": sum(counts.values()), "reasons": counts}
+
+
+def prefilter_mask(texts: Sequence[Optional[str]], level: str,
+                   stats: Optional[PrefilterStats] = None) -> List[bool]:
+    """True for each text that should still go to the model."""
+    if level == "off":
+        return [True] * len(texts)
+    if level not in LEVELS:
+        raise ValueError(f"Unknown pre-filter strictness {level!r}; expected one of {LEVELS}")
+
+    keep, counts = [], {"analyzed": 0}
+    for text in texts:
+        reason = skip_reason(text, level) if text else None
+        keep.append(reason is None)
+        if text:
+            outcome = reason or "analyzed"
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    for outcome, n in counts.items():
+        if n:
+            PREFILTER_COMMENTS.inc(n, level=level, outcome=outcome)
+    if stats is not None:
+        stats.add(counts)
+    return keep
+
+
+def evaluate(absa, texts: List[str], levels: Sequence[str] = LEVELS[1:]) -> Dict[str, Any]:
+    """
+    Runs the model on every text (pre-filter off) and reports, per level, how
+    many comments would be skipped and how much of the model's output that
+    loses: comments with aspects, aspect rows, and rows that map to a category.
+    """
+    results = absa.analyze_batch(texts, prefilter="off")
+
+    def totals(mask):
+        rows = [it for keep, items in zip(mask, results) if keep for it in items if it.get("aspect")]
+        return {
+            "comments_with_aspects": sum(1 for keep, items in zip(mask, results)
+                                         if keep and any(it.get("aspect") for it in items)),
+            "aspect_rows": len(rows),
+            "category_rows": sum(1 for it in rows if map_aspect_category(it["aspect"]) != "misc"),
+        }
+
+    baseline = totals([True] * len(texts))
+    report = {"comments": len(texts), "baseline": baseline, "levels": {}}
+    for level in levels:
+        mask = [not t or skip_reason(t, level) is None for t in texts]
+        kept = totals(mask)
+        skipped = mask.count(False)
+        report["levels"][level] = {
+            "skipped": skipped,
+            "skip_rate": round(skipped / max(len(texts), 1), 4),
+            **{f"{k}_recall": round(kept[k] / baseline[k], 4) if baseline[k] else 1.0 for k in baseline},
+            "lost_examples": [t for t, keep, items in zip(texts, mask, results)
+                              if not keep and any(it.get("aspect") for it in items)][:10],
+        }
+    return report
@@ -0,0 +1,119 @@
+# response_cache.py
+# Finished /course/<id>/analysis response bodies, keyed by course, request
+# options, result tag and the course's review-set version. A new review bumps
+# the version, so stale entries are never looked up again and simply age out.
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Optional
+
+from absa_cache import LRUTier, MongoTier
+from metrics import log_event
+from settings import (
+    RESPONSE_CACHE,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_BACKEND,
+    RESPONSE_CACHE_COLLECTION,
+    RESPONSE_CACHE_DIR,
+)
+
+
+def response_key(course_id: str, version: str, result_tag: str, **options) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps([course_id, version, result_tag, sorted(options.items())], default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+class FileTier:
+    """Shared tier of one file per entry in a local directory."""
+
+    name = "file"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value) -> None:
+        # write-then-rename so concurrent readers never see a partial body
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp, self._path(key))
+
+
+class ResponseCache:
+    """In-process LRU of JSON bodies in front of an optional shared tier."""
+
+    def __init__(self, memory: LRUTier, shared=None):
+        self.memory = memory
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "shared_hits": 0, "misses": 0, "not_modified": 0}
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        body = self.memory.get(key)
+        if body is not None:
+            self.count("hits")
+            return body
+        if self.shared is not None:
+            try:
+                body = self.shared.get(key)
+            except Exception as e:
+                log_event("response_cache.read_failed", logging.WARNING, backend=self.shared.name, error=str(e))
+                body = None
+            if body is not None:
+                self.memory.set(key, body)
+                self.count("shared_hits")
+                return body
+        self.count("misses")
+        return None
+
+    def set(self, key: str, body: str) -> None:
+        self.memory.set(key, body)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, body)
+            except Exception as e:
+                log_event("response_cache.write_failed", logging.WARNING, backend=self.shared.name, error=str(e))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["memory_entries"] = len(self.memory)
+        stats["backend"] = self.shared.name if self.shared is not None else "memory"
+        return stats
+
+
+def build_response_cache() -> Optional[ResponseCache]:
+    """ResponseCache configured from settings, or None when disabled."""
+    if not RESPONSE_CACHE:
+        return None
+    shared = None
+    try:
+        if RESPONSE_CACHE_BACKEND == "mongo":
+            shared = MongoTier(RESPONSE_CACHE_COLLECTION)
+        elif RESPONSE_CACHE_BACKEND == "file":
+            shared = FileTier(RESPONSE_CACHE_DIR)
+        elif RESPONSE_CACHE_BACKEND:
+            log_event("response_cache.unknown_backend", logging.WARNING, backend=RESPONSE_CACHE_BACKEND)
+    except Exception as e:
+        log_event("response_cache.backend_unavailable", logging.WARNING, backend=RESPONSE_CACHE_BACKEND,
+                  error=str(e))
+    return ResponseCache(LRUTier(RESPONSE_CACHE_SIZE, None), shared)
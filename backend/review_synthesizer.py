@@ -1,6 +1,11 @@
 # review_synthesizer.py
-from collections import defaultdict
-from typing import List, Dict, Any
+import logging
+import re
+from collections import defaultdict, deque
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+
+from metrics import log_event
 
 ASPECT_KEYWORDS = {
     "instructor": [
@@ -8,22 +13,22 @@ ASPECT_KEYWORDS = {
         "instructors", "teachers", "lecturers", "tutors", "professors", "mentors",
         "teach", "teaches", "taught", "teaching", "lecture", "lectures", "lectured", "lecturing",
         "guide", "guides", "guided", "guiding",
-        "man", "guy", "sir", "ma'am", "lady", "mam", "madam" "followers", "fan", "fans", "explain", "explained", "explanation", "explaining", "guide", "guides", "guided", "guiding", "lecturing", "lectured", "channel", "channels", "advice"
+        "man", "guy", "sir", "ma'am", "lady", "mam", "madam", "followers", "fan", "fans", "explain", "explained", "explanation", "explaining", "channel", "channels", "advice"
     ],
 
     "content": [
         "content", "slide", "slides", "material", "materials", "topic", "topics",
-        "lesson", "lessons", "chapter", "chapters", "course", "courses", "lecture", "lectures"
+        "lesson", "lessons", "chapter", "chapters", "course", "courses", "lecture", "lectures",
         "project", "projects", "practical", "practicals", "tutorial", "tutorials",
         "formula", "formulas", "formulae",
-        "python", "java", "c++", "javascript", "language", "framework", "library", "libraries", "captions", "caption", "code", "coding", "programming", "learn", "learning", "program", "programs", "learned", "learns", "playlist", "concept", "concepts", "subtitle", "subtitles","subject", "software", "softwares", "Functions", "Objects", "old"
+        "python", "java", "c++", "javascript", "language", "framework", "library", "libraries", "captions", "caption", "code", "coding", "programming", "learn", "learning", "program", "programs", "learned", "learns", "playlist", "concept", "concepts", "subtitle", "subtitles","subject", "software", "softwares", "functions", "objects", "old"
     ],
 
     "pace": [
         "pace", "pacing", "speed", "timing", "duration", "flow",
         "fast", "faster", "quick", "quicker", "slow", "slower", "laggy", "dragging",
         "boring", "bored", "rush", "rushed", "hurried", "too fast", "too slow",
-        "slowly", "quickly", "follow", "follows", "following", "time", "timing", "timed"
+        "slowly", "quickly", "follow", "follows", "following", "time", "timed"
     ],
 
     "pricing": [
@@ -35,28 +40,158 @@ ASPECT_KEYWORDS = {
     "sound_quality": [
         "sound", "audio", "voice", "microphone", "mic", "clarity", "noise", "noisy",
         "echo", "distortion", "volume", "loud", "quiet", "muffled", "clear", "unclear",
-        "background noise", "buzz", "hiss", "speaker", "words", "word", "clarity",
+        "background noise", "buzz", "hiss", "speaker", "words", "word",
     ],
 
     "video_quality": [
-        "video", "videos", "quality", "graphics", "blur", "blurry", "resolution", "resolutions"
+        "video", "videos", "quality", "graphics", "blur", "blurry", "resolution", "resolutions",
         "visual", "visuals", "camera", "focus", "hd", "1080p", "720p", "recording",
         "footage", "frame", "brightness", "contrast", "unclear", "subtitle", "subtitles", "background", "backgrounds", "dark", "light", "bright"
     ],
 }
 
+# keyword table validation
+
+def validate_keywords(table: Dict[str, List[str]]) -> List[Tuple[str, str, str]]:
+    """
+    Returns (kind, category, keyword) issues found in a keyword table:
+    "duplicate" within a category, "merged" for two keywords fused by a
+    missing comma, "not_lowercase" (never matches a lowercased aspect) and
+    "unreachable" when an earlier category always wins for that keyword.
+    """
+    issues = []
+    known = {kw for kws in table.values() for kw in kws}
+    stems = [kw for kw in known if len(kw) >= 5]
+
+    def wordlike(part: str) -> bool:
+        return part in known or any(part.startswith(stem) for stem in stems)
+    earlier: List[str] = []
+
+    for category, keywords in table.items():
+        seen = set()
+        for kw in keywords:
+            if kw in seen:
+                issues.append(("duplicate", category, kw))
+                continue
+            seen.add(kw)
+
+            if kw != kw.lower():
+                issues.append(("not_lowercase", category, kw))
+            # "madam" "followers" -> "madamfollowers": one half looks like a
+            # known keyword and both halves are word-sized
+            if " " not in kw and any(
+                wordlike(kw[:i]) or wordlike(kw[i:])
+                for i in range(5, len(kw) - 4)
+            ):
+                issues.append(("merged", category, kw))
+            if any(e in kw.lower() for e in earlier):
+                issues.append(("unreachable", category, kw))
+        earlier.extend(kw.lower() for kw in seen)
+
+    return issues
+
+
 # aspect to category mapper
 
+class _RegexMatcher:
+    """
+    One combined regex: a zero-width lookahead tried at every position, with
+    one named group per category in priority order. At each position the
+    alternation picks the highest-priority category whose keyword starts
+    there, so the minimum over all positions reproduces first-match order.
+    """
+
+    def __init__(self, table: Dict[str, List[str]]):
+        self.categories = list(table)
+        groups = []
+        for i, keywords in enumerate(table.values()):
+            alts = "|".join(re.escape(kw.lower()) for kw in sorted(set(keywords), key=len, reverse=True))
+            groups.append(f"(?P<c{i}>{alts})")
+        self._rx = re.compile("(?=(?:" + "|".join(groups) + "))")
+
+    def match(self, aspect: str) -> str:
+        best = None
+        for m in self._rx.finditer(aspect):
+            idx = int(m.lastgroup[1:])
+            if best is None or idx < best:
+                best = idx
+                if best == 0:
+                    break
+        return self.categories[best] if best is not None else "misc"
+
+
+class _AhoCorasickMatcher:
+    """Aho-Corasick automaton over all keywords; each state keeps its best category."""
+
+    def __init__(self, table: Dict[str, List[str]]):
+        self.categories = list(table)
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Optional[int]] = [None]
+
+        for idx, keywords in enumerate(table.values()):
+            for kw in keywords:
+                state = 0
+                for ch in kw.lower():
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        goto.append({})
+                        out.append(None)
+                        nxt = goto[state][ch] = len(goto) - 1
+                    state = nxt
+                if out[state] is None or idx < out[state]:
+                    out[state] = idx
+
+        # breadth-first failure links; fold each fail state's best category in
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f][ch] if ch in goto[f] and goto[f][ch] != nxt else 0
+                inherited = out[fail[nxt]]
+                if inherited is not None and (out[nxt] is None or inherited < out[nxt]):
+                    out[nxt] = inherited
+
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def match(self, aspect: str) -> str:
+        goto, fail, out = self._goto, self._fail, self._out
+        state, best = 0, None
+        for ch in aspect:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = out[state]
+            if hit is not None and (best is None or hit < best):
+                best = hit
+                if best == 0:
+                    break
+        return self.categories[best] if best is not None else "misc"
+
+
+for _kind, _category, _kw in validate_keywords(ASPECT_KEYWORDS):
+    if _kind != "unreachable":
+        log_event("keywords.invalid", logging.WARNING, category=_category, kind=_kind, keyword=_kw)
+
+# Aho-Corasick walks each aspect once; the regex variant is kept for
+# benchmarks/bench_category_matcher.py, where it measures ~4x slower
+_matcher = _AhoCorasickMatcher(ASPECT_KEYWORDS)
+
+
+@lru_cache(maxsize=8192)
+def _map_normalized(aspect: str) -> str:
+    return _matcher.match(aspect)
+
+
 def map_aspect_category(aspect: str) -> str:
     if not aspect:
         return "misc"
 
-    aspect = aspect.lower().strip()
-    for category, keywords in ASPECT_KEYWORDS.items():
-        for kw in keywords:
-            if kw in aspect:
-                return category
-    return "misc"
+    return _map_normalized(aspect.lower().strip())
 
 
 # aggregate aspect scores
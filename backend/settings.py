@@ -0,0 +1,114 @@
+# settings.py
+# Optional tuning knobs. Every name below can be overridden by defining
+# the same name in config.py; anything left out falls back to the default.
+import os
+
+try:
+    import config as _config
+except ImportError:  # config.py is local-only and not checked in
+    _config = None
+
+
+def _get(name, default):
+    return getattr(_config, name, default)
+
+
+# --- inference ---
+ABSA_BATCH_SIZE = _get("ABSA_BATCH_SIZE", 16)
+ABSA_SORT_BY_LENGTH = _get("ABSA_SORT_BY_LENGTH", True)
+
+# --- result cache ---
+ABSA_CACHE_SIZE = _get("ABSA_CACHE_SIZE", 10000)         # entries in the in-process LRU
+ABSA_CACHE_TTL = _get("ABSA_CACHE_TTL", 6 * 60 * 60)     # seconds, None = never expire
+ABSA_CACHE_BACKEND = _get("ABSA_CACHE_BACKEND", None)    # None, "sqlite" or "mongo"
+ABSA_CACHE_SQLITE_PATH = _get("ABSA_CACHE_SQLITE_PATH", "absa_cache.sqlite3")
+ABSA_CACHE_COLLECTION = _get("ABSA_CACHE_COLLECTION", "absa_cache")
+
+# --- ingest-time analysis ---
+# False: store raw text only. "inline": analyze while collecting and store the
+# parsed aspects on each review. "background": store first, analyze in a thread.
+ANALYZE_ON_INGEST = _get("ANALYZE_ON_INGEST", False)
+
+# --- background jobs ---
+JOB_WORKERS = _get("JOB_WORKERS", 2)
+JOB_RETENTION = _get("JOB_RETENTION", 500)   # finished jobs kept for polling
+
+# --- YouTube collection ---
+YOUTUBE_API_BASE = _get("YOUTUBE_API_BASE", "https://www.googleapis.com/youtube/v3")
+YOUTUBE_PAGE_SIZE = _get("YOUTUBE_PAGE_SIZE", 100)        # API maximum for commentThreads
+YOUTUBE_HTTP_RETRIES = _get("YOUTUBE_HTTP_RETRIES", 3)
+YOUTUBE_HTTP_BACKOFF = _get("YOUTUBE_HTTP_BACKOFF", 0.5)  # seconds, doubled per retry
+YOUTUBE_HTTP_TIMEOUT = _get("YOUTUBE_HTTP_TIMEOUT", 15)
+YOUTUBE_PREFETCH_PAGES = _get("YOUTUBE_PREFETCH_PAGES", 2)
+# bulk collection: videos fetched at once, API requests per second, videos per call
+BULK_COLLECT_CONCURRENCY = _get("BULK_COLLECT_CONCURRENCY", 4)
+BULK_COLLECT_RATE = _get("BULK_COLLECT_RATE", 10)
+BULK_COLLECT_MAX_VIDEOS = _get("BULK_COLLECT_MAX_VIDEOS", 200)
+
+# --- incremental analysis ---
+# When enabled, /course/<id>/analysis keeps running per-course statistics and
+# only analyzes reviews added since the last refresh (no 100-review cap).
+INCREMENTAL_ANALYSIS = _get("INCREMENTAL_ANALYSIS", False)
+COURSE_STATS_COLLECTION = _get("COURSE_STATS_COLLECTION", "course_stats")
+# a refresh re-reads this many sequence numbers below its watermark (skipping
+# reviews it already folded), so a write that reserved its numbers before a
+# later one but committed after it is still picked up
+COURSE_STATS_SEQ_OVERLAP = _get("COURSE_STATS_SEQ_OVERLAP", 1000)
+
+# --- analysis response cache ---
+# Built /course/<id>/analysis responses are kept per (course, review-set
+# version) and served with an ETag. "mongo" or "file" shares them between
+# Flask workers; None keeps them in-process only.
+RESPONSE_CACHE = _get("RESPONSE_CACHE", True)
+RESPONSE_CACHE_SIZE = _get("RESPONSE_CACHE_SIZE", 256)
+RESPONSE_CACHE_BACKEND = _get("RESPONSE_CACHE_BACKEND", None)
+RESPONSE_CACHE_COLLECTION = _get("RESPONSE_CACHE_COLLECTION", "analysis_responses")
+RESPONSE_CACHE_DIR = _get("RESPONSE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "response_cache"))
+REVIEW_VERSION_COLLECTION = _get("REVIEW_VERSION_COLLECTION", "review_versions")
+
+# --- review reads ---
+MAX_ANALYSIS_REVIEWS = _get("MAX_ANALYSIS_REVIEWS", 100)   # None or 0 = no cap
+REVIEW_READ_BATCH = _get("REVIEW_READ_BATCH", 500)         # docs per cursor batch
+COMPARE_MAX_COURSES = _get("COMPARE_MAX_COURSES", 20)      # course ids per comparison request
+
+# --- inference worker processes ---
+INFERENCE_WORKERS = _get("INFERENCE_WORKERS", 0)             # 0 = run the model in-process
+# CPU backend for the ATEPC model: "pyabsa" (fp32 torch), "int8" (dynamic
+# quantization) or "onnx" (ONNX Runtime; exports are cached in ONNX_MODEL_DIR)
+INFERENCE_BACKEND = _get("INFERENCE_BACKEND", "pyabsa")
+ONNX_MODEL_DIR = _get("ONNX_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_models"))
+INFERENCE_TORCH_THREADS = _get("INFERENCE_TORCH_THREADS", None)  # per worker; None = cores / workers
+INFERENCE_READY_TIMEOUT = _get("INFERENCE_READY_TIMEOUT", 600)  # seconds for every worker to load the model
+
+# --- startup ---
+MODEL_WARMUP = _get("MODEL_WARMUP", True)   # load the checkpoint + dummy inference in a boot thread
+
+# --- preprocessing ---
+# Tokens are whitespace words here: a cheap proxy for the model's subword count.
+ABSA_PREPROCESS = _get("ABSA_PREPROCESS", True)
+PREPROCESS_WINDOW_TOKENS = _get("PREPROCESS_WINDOW_TOKENS", 48)     # words per window sent to the model
+PREPROCESS_MAX_TOKENS = _get("PREPROCESS_MAX_TOKENS", 256)          # words kept per comment
+
+# --- pre-filter (comments routed around the model; see prefilter.py) ---
+PREFILTER_STRICTNESS = _get("PREFILTER_STRICTNESS", "off")  # off | conservative | balanced | aggressive
+PREFILTER_SHORT_WORDS = _get("PREFILTER_SHORT_WORDS", 3)    # "balanced": shorter comments need an aspect term
+PREFILTER_MIN_LATIN = _get("PREFILTER_MIN_LATIN", 0.5)      # "balanced": min share of Latin letters
+
+# --- transcript ingestion (see transcripts.py) ---
+TRANSCRIPT_COLLECTION = _get("TRANSCRIPT_COLLECTION", "transcripts")                    # one doc per window
+TRANSCRIPT_ANALYSIS_COLLECTION = _get("TRANSCRIPT_ANALYSIS_COLLECTION", "transcript_analyses")  # result per video
+TRANSCRIPT_LANGUAGES = _get("TRANSCRIPT_LANGUAGES", ["en"])       # preferred caption languages, in order
+TRANSCRIPT_WINDOW_TOKENS = _get("TRANSCRIPT_WINDOW_TOKENS", 48)   # words per window sent to the model
+TRANSCRIPT_BATCH_WINDOWS = _get("TRANSCRIPT_BATCH_WINDOWS", 64)   # windows stored + analyzed per step
+TRANSCRIPT_MAX_WINDOWS = _get("TRANSCRIPT_MAX_WINDOWS", 2000)     # ~96k words; longer transcripts are cut
+TRANSCRIPT_FIXTURE_DIR = _get("TRANSCRIPT_FIXTURE_DIR", None)     # read <video_id>.json here instead of YouTube
+
+# --- aspect normalization (near-duplicate aspects merged; see aspect_normalize.py) ---
+ASPECT_NORMALIZATION = _get("ASPECT_NORMALIZATION", "cluster")   # off | lemma | cluster
+ASPECT_CLUSTER_THRESHOLD = _get("ASPECT_CLUSTER_THRESHOLD", 0.6) # min character-trigram Jaccard to join a cluster
+ASPECT_CLUSTER_MIN_LENGTH = _get("ASPECT_CLUSTER_MIN_LENGTH", 5) # shorter aspects are only lemma-merged
+ASPECT_CANONICAL_MAX = _get("ASPECT_CANONICAL_MAX", 100_000)     # aspects remembered per process
+
+# --- metrics and logging ---
+SERVER_TIMING = _get("SERVER_TIMING", False)   # add a Server-Timing header with per-stage durations
+LOG_LEVEL = _get("LOG_LEVEL", "INFO")
@@ -0,0 +1,92 @@
+# Shared fixtures: a local stand-in for the YouTube commentThreads endpoint, so
+# the collectors are exercised over real HTTP without network access or quota.
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubYouTube:
+    """
+    Serves `total` comments per video in pages of maxResults, chained by
+    numeric pageTokens. Video ids select failure modes: "forbidden" ones get
+    403, "flaky" ones a 503 on their first request, "dropped" ones a closed
+    connection on their first request.
+    """
+
+    def __init__(self, total=250):
+        self.total = total
+        self.requests = []  # (videoId, pageToken or None), in arrival order
+        self._failed = set()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def pages_served(self, video_id):
+        return sum(1 for v, _ in self.requests if v == video_id)
+
+    def _first_failure(self, video_id):
+        with self._lock:
+            if video_id in self._failed:
+                return False
+            self._failed.add(video_id)
+            return True
+
+    def handle(self, handler):
+        q = {k: v[0] for k, v in parse_qs(urlparse(handler.path).query).items()}
+        video_id = q["videoId"]
+        with self._lock:
+            self.requests.append((video_id, q.get("pageToken")))
+
+        if video_id.startswith("forbidden"):
+            return self._send(handler, 403, {"error": {"code": 403, "message": "commentsDisabled"}})
+        if video_id.startswith("flaky") and self._first_failure(video_id):
+            return self._send(handler, 503, {"error": {"code": 503, "message": "backendError"}})
+        if video_id.startswith("dropped") and self._first_failure(video_id):
+            handler.close_connection = True
+            return
+
+        start = int(q.get("pageToken", 0))
+        end = min(start + int(q["maxResults"]), self.total)
+        body = {"items": [
+            {"id": f"{video_id}-{i}",
+             "snippet": {"topLevelComment": {"snippet": {"textDisplay": f"comment {i}"}}}}
+            for i in range(start, end)
+        ]}
+        if end < self.total:
+            body["nextPageToken"] = str(end)
+        self._send(handler, 200, body)
+
+    @staticmethod
+    def _send(handler, status, body):
+        payload = json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+
+@pytest.fixture
+def youtube():
+    stub = StubYouTube()
+    thread = threading.Thread(target=stub.server.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import bulk_collector
+
+
+@pytest.fixture(autouse=True)
+def no_db(monkeypatch):
+    """Counts stored docs instead of writing them; drops retry backoff sleeps."""
+    stored = []
+    monkeypatch.setattr(bulk_collector, "insert_reviews", lambda collection, docs: stored.extend(docs) or len(docs))
+    monkeypatch.setattr(bulk_collector, "YOUTUBE_HTTP_BACKOFF", 0)
+    return stored
+
+
+def collect(youtube, videos, max_results=50):
+    return bulk_collector.collect_many(videos, max_results, api_key="key", base_url=youtube.base_url,
+                                       limiter=bulk_collector.RateLimiter(0))
+
+
+def test_results_are_per_video_and_in_input_order(youtube, no_db):
+    summary = collect(youtube, ["abcdefghijk", "forbidden00", "not a video url",
+                                "https://youtu.be/abcdefghijk"], max_results=150)
+
+    ok, forbidden, invalid, duplicate = summary["videos"]
+    assert (ok["video_id"], ok["fetched"], ok["error"]) == ("abcdefghijk", 150, None)
+    assert forbidden["fetched"] == 0 and "commentsDisabled" in forbidden["error"]
+    assert invalid["video_id"] is None and invalid["error"]
+    assert duplicate["fetched"] == 150 and duplicate["input"] == "https://youtu.be/abcdefghijk"
+
+    # the duplicate was collected once: two pages, one 403
+    assert youtube.pages_served("abcdefghijk") == 2
+    assert youtube.pages_served("forbidden00") == 1
+    assert (summary["fetched"], summary["inserted"], summary["errors"]) == (150, 150, 2)
+    assert len(no_db) == 150
+
+
+def test_pages_follow_next_page_token(youtube):
+    summary = collect(youtube, ["abcdefghijk"], max_results=1000)
+
+    assert summary["fetched"] == youtube.total
+    assert youtube.requests == [("abcdefghijk", None), ("abcdefghijk", "100"), ("abcdefghijk", "200")]
+
+
+@pytest.mark.parametrize("video_id", ["flaky000000", "dropped0000"])
+def test_transient_failures_are_retried(youtube, video_id):
+    summary = collect(youtube, [video_id])
+
+    assert summary["videos"][0]["error"] is None
+    assert summary["fetched"] == 50
+    assert youtube.pages_served(video_id) == 2
+
+
+def test_rejects_inline_analysis():
+    with pytest.raises(ValueError):
+        bulk_collector.collect_many(["abcdefghijk"], analyze="inline")
+
+
+def test_rate_limiter_is_shared_across_event_loops():
+    limiter = bulk_collector.RateLimiter(100)
+
+    async def drain():
+        for _ in range(100):
+            await limiter.acquire()
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=asyncio.run, args=(drain(),)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # a burst of 100, then the other 100 at 100/s
+    assert time.monotonic() - started >= 0.9
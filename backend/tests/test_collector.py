@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+import collector
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """A fresh retrying session without backoff sleeps."""
+    monkeypatch.setattr(collector, "YOUTUBE_HTTP_BACKOFF", 0)
+    monkeypatch.setattr(collector, "_session", None)
+    return collector.get_session()
+
+
+def test_pages_follow_next_page_token(youtube, session):
+    pages = list(collector.iter_comment_pages("abcdefghijk", "key", 230,
+                                              session=session, base_url=youtube.base_url))
+
+    assert [len(p) for p in pages] == [100, 100, 30]
+    assert youtube.requests == [("abcdefghijk", None), ("abcdefghijk", "100"), ("abcdefghijk", "200")]
+    assert pages[2][-1] == {"comment_id": "abcdefghijk-229", "text": "comment 229"}
+
+
+def test_pages_stop_when_the_video_runs_out(youtube, session):
+    pages = list(collector.iter_comment_pages("abcdefghijk", "key", 1000,
+                                              session=session, base_url=youtube.base_url))
+
+    assert sum(len(p) for p in pages) == youtube.total
+    assert youtube.pages_served("abcdefghijk") == 3
+
+
+def test_prefetch_stops_fetching_once_abandoned(youtube, session, monkeypatch):
+    monkeypatch.setattr(collector, "YOUTUBE_PAGE_SIZE", 10)
+    pages = collector.iter_comment_pages("abcdefghijk", "key", 250,
+                                         session=session, base_url=youtube.base_url)
+    stream = collector.prefetch(pages, depth=1)
+
+    assert len(next(stream)) == 10
+    stream.close()
+    time.sleep(0.3)
+
+    # the page handed out, one buffered and at most one in flight; not all 25
+    assert youtube.pages_served("abcdefghijk") <= 3
+
+
+def test_prefetch_surfaces_producer_errors(youtube, session):
+    pages = collector.iter_comment_pages("forbidden00", "key", 50,
+                                         session=session, base_url=youtube.base_url)
+    with pytest.raises(Exception, match="commentsDisabled"):
+        list(collector.prefetch(pages))
+
+
+@pytest.mark.parametrize("video_id", ["flaky000000", "dropped0000"])
+def test_transient_failures_are_retried(youtube, session, video_id):
+    pages = list(collector.iter_comment_pages(video_id, "key", 50,
+                                              session=session, base_url=youtube.base_url))
+
+    assert [len(p) for p in pages] == [50]
+    assert youtube.pages_served(video_id) == 2
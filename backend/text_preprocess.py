@@ -0,0 +1,118 @@
+# text_preprocess.py
+# Cleans comments before inference and cuts long ones into sentence windows so
+# a handful of essays don't dominate batch padding or overflow the model's
+# max sequence length. Token counts are whitespace words.
+import html
+import re
+import threading
+import unicodedata
+from typing import Dict, List
+
+from settings import PREPROCESS_WINDOW_TOKENS, PREPROCESS_MAX_TOKENS
+
+_url = re.compile(r"https?://\S+|www\.\S+")
+_invisible = re.compile(r"[\u200b-\u200f\u2060\ufeff]")
+_ws = re.compile(r"\s+")
+_sentence_end = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def clean_text(text: str) -> str:
+    """Unescapes entities, drops URLs and invisible characters, collapses whitespace."""
+    text = unicodedata.normalize("NFC", html.unescape(text))
+    text = _invisible.sub("", _url.sub(" ", text))
+    return _ws.sub(" ", text).strip()
+
+
+def has_content(text: str) -> bool:
+    """False for empty, emoji-only or punctuation-only comments."""
+    return any(ch.isalnum() for ch in text)
+
+
+def split_windows(text: str, window_tokens: int = PREPROCESS_WINDOW_TOKENS,
+                  max_tokens: int = PREPROCESS_MAX_TOKENS) -> List[str]:
+    """
+    Packs whole sentences into windows of at most `window_tokens` words, chopping
+    any single over-long sentence, and stops once `max_tokens` words are used.
+    """
+    words = text.split(" ")
+    if len(words) <= window_tokens:
+        return [text]
+
+    windows: List[str] = []
+    current: List[str] = []
+    budget = max_tokens
+
+    for sentence in _sentence_end.split(text):
+        sent_words = sentence.split()
+        while sent_words and budget > 0:
+            room = min(window_tokens - len(current), budget)
+            if room <= 0 or (current and len(sent_words) > room):
+                windows.append(" ".join(current))
+                current = []
+                continue
+            take = sent_words[:room]
+            current.extend(take)
+            sent_words = sent_words[room:]
+            budget -= len(take)
+        if budget <= 0:
+            break
+
+    if current:
+        windows.append(" ".join(current))
+    return windows
+
+
+class PreprocessStats:
+    """Counters for one request (or, cumulatively, for the process)."""
+
+    FIELDS = ("comments", "dropped", "prefiltered", "split", "truncated", "windows", "tokens_in", "tokens_out")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, **counts) -> None:
+        with self._lock:
+            for k, v in counts.items():
+                self._counts[k] += v
+
+    def merge(self, other: "PreprocessStats") -> None:
+        self.add(**other.as_dict())
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+def preprocess_comments(texts: List[str], stats: PreprocessStats = None,
+                        window_tokens: int = PREPROCESS_WINDOW_TOKENS,
+                        max_tokens: int = PREPROCESS_MAX_TOKENS) -> List[List[str]]:
+    """
+    Returns the model-ready windows for each comment (empty list = skip it).
+    Short clean comments come back as a single window.
+    """
+    out: List[List[str]] = []
+    counts = dict.fromkeys(PreprocessStats.FIELDS, 0)
+
+    for text in texts:
+        counts["comments"] += 1
+        cleaned = clean_text(text) if text else ""
+        if not has_content(cleaned):
+            counts["dropped"] += 1
+            out.append([])
+            continue
+
+        n_words = cleaned.count(" ") + 1
+        windows = split_windows(cleaned, window_tokens, max_tokens)
+        counts["tokens_in"] += n_words
+        counts["tokens_out"] += min(n_words, max_tokens) if len(windows) > 1 else n_words
+        counts["windows"] += len(windows)
+        if len(windows) > 1:
+            counts["split"] += 1
+        if n_words > max_tokens:
+            counts["truncated"] += 1
+        out.append(windows)
+
+    if stats is not None:
+        stats.add(**counts)
+    return out
@@ -0,0 +1,201 @@
+# transcripts.py
+# Transcript (course content) ingestion: fetches a video's captions, packs the
+# caption segments into word windows, and streams the windows through batched
+# ABSA a batch at a time - each batch is bulk-stored with its analysis and
+# folded into running stats, so memory and per-step latency stay bounded
+# however long the lecture is. Transcripts never change, so the finished
+# result is stored per video id and served from there afterwards.
+#
+# Fetching goes through a client with `fetch(video_id, languages)` returning
+# {"text", "start", "duration"} segments: YouTubeClient for the real API,
+# FixtureClient for <video_id>.json files (offline runs and benchmarks).
+import json
+import os
+import re
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from aggregation_engine import AggregationEngine
+from aspect_normalize import get_canonical_table
+from collector import extract_video_id
+from db_client import (
+    insert_transcript_chunks,
+    delete_transcript_chunks,
+    get_transcript_analysis,
+    set_transcript_analysis,
+)
+from ingest_analysis import analysis_fields
+from metrics import timed, log_event
+from settings import (
+    TRANSCRIPT_LANGUAGES,
+    TRANSCRIPT_WINDOW_TOKENS,
+    TRANSCRIPT_BATCH_WINDOWS,
+    TRANSCRIPT_MAX_WINDOWS,
+    TRANSCRIPT_FIXTURE_DIR,
+)
+from text_preprocess import clean_text
+
+# [Music], [Applause], [inaudible] ...
+_cue = re.compile(r"\[[^\]]*\]")
+
+
+class YouTubeClient:
+    """Captions from YouTube through youtube_transcript_api (1.x instance API or the older classmethods)."""
+
+    def __init__(self, api=None):
+        if api is None:
+            from youtube_transcript_api import YouTubeTranscriptApi
+            api = YouTubeTranscriptApi
+        self.api = api
+
+    def fetch(self, video_id: str, languages: Iterable[str] = ("en",)) -> Iterable[Dict[str, Any]]:
+        if hasattr(self.api, "get_transcript"):
+            return self.api.get_transcript(video_id, languages=list(languages))
+        fetched = (self.api() if isinstance(self.api, type) else self.api).fetch(video_id, languages=list(languages))
+        return ({"text": s.text, "start": s.start, "duration": s.duration} for s in fetched)
+
+
+class FixtureClient:
+    """Captions from `<directory>/<video_id>.json`, a list of {"text", "start", "duration"}."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def fetch(self, video_id: str, languages: Iterable[str] = ("en",)) -> Iterable[Dict[str, Any]]:
+        path = os.path.join(self.directory, f"{video_id}.json")
+        if not os.path.exists(path):
+            raise LookupError(f"No transcript fixture for video {video_id}")
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+
+def build_transcript_client():
+    return FixtureClient(TRANSCRIPT_FIXTURE_DIR) if TRANSCRIPT_FIXTURE_DIR else YouTubeClient()
+
+
+def iter_windows(segments: Iterable[Dict[str, Any]],
+                 window_tokens: int = TRANSCRIPT_WINDOW_TOKENS) -> Iterator[Dict[str, Any]]:
+    """
+    Packs consecutive caption segments into windows of at most `window_tokens`
+    words (a longer segment is cut), yielding {"text", "start", "end"} lazily.
+    """
+    words: List[str] = []
+    start = end = None
+    for seg in segments:
+        text = clean_text(_cue.sub(" ", seg.get("text") or ""))
+        if not text:
+            continue
+        seg_start = float(seg.get("start") or 0.0)
+        seg_end = seg_start + float(seg.get("duration") or 0.0)
+        seg_words = text.split(" ")
+        if words and len(words) + len(seg_words) > window_tokens:
+            yield {"text": " ".join(words), "start": start, "end": end}
+            words = []
+        if not words:
+            start = seg_start
+        while len(seg_words) > window_tokens:
+            yield {"text": " ".join(seg_words[:window_tokens]), "start": start, "end": seg_end}
+            seg_words = seg_words[window_tokens:]
+        words.extend(seg_words)
+        end = seg_end
+    if words:
+        yield {"text": " ".join(words), "start": start, "end": end}
+
+
+def _batches(iterable: Iterable, size: int) -> Iterator[List]:
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _settings(absa, languages: List[str]) -> Dict[str, Any]:
+    """Everything a stored result depends on besides the video itself."""
+    return {
+        "result_tag": absa.result_tag,
+        "aspects": get_canonical_table().tag,
+        "languages": list(languages),
+        "window_tokens": TRANSCRIPT_WINDOW_TOKENS,
+        "max_windows": TRANSCRIPT_MAX_WINDOWS,
+    }
+
+
+def _is_current(doc: Optional[Dict[str, Any]], settings: Dict[str, Any]) -> bool:
+    return doc is not None and all(doc.get(k) == v for k, v in settings.items())
+
+
+def cached_transcript_analysis(video_id: str, absa, languages: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """The stored result for `video_id`, if it was built with the current model and settings."""
+    doc = get_transcript_analysis(video_id)
+    return doc["payload"] if _is_current(doc, _settings(absa, languages or TRANSCRIPT_LANGUAGES)) else None
+
+
+def ingest_transcript(video_url: str, absa, client=None, languages: Optional[List[str]] = None,
+                      refresh: bool = False, on_batch=None) -> Dict[str, Any]:
+    """
+    Fetches, windows, stores and analyzes the transcript of `video_url` and
+    returns its analysis payload. A stored result is returned as-is unless
+    `refresh`. `on_batch(windows_done)` is called after each batch.
+    """
+    video_id = extract_video_id(video_url)
+    if not video_id:
+        raise ValueError("Invalid YouTube URL provided.")
+    languages = languages or TRANSCRIPT_LANGUAGES
+    if not refresh:
+        cached = cached_transcript_analysis(video_id, absa, languages)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+    client = client or build_transcript_client()
+    started = time.perf_counter()
+    with timed("transcript_fetch"):
+        segments = client.fetch(video_id, languages)
+
+    engine = AggregationEngine()
+    chunks = words = 0
+    duration = 0.0
+    windows = iter_windows(segments, TRANSCRIPT_WINDOW_TOKENS)
+    for batch in _batches(islice(windows, TRANSCRIPT_MAX_WINDOWS), TRANSCRIPT_BATCH_WINDOWS):
+        # windows are already clean and model-sized
+        analyses = absa.analyze_batch([w["text"] for w in batch], preprocess=False)
+        with timed("fold", items=len(batch)):
+            engine.add([it for items in analyses for it in items])
+
+        docs = []
+        for i, (w, items) in enumerate(zip(batch, analyses)):
+            docs.append({"video_id": video_id, "chunk": chunks + i, **w,
+                         **analysis_fields(items, absa.result_tag)})
+        insert_transcript_chunks(docs)
+
+        chunks += len(batch)
+        words += sum(w["text"].count(" ") + 1 for w in batch)
+        duration = max(duration, batch[-1]["end"] or 0.0)
+        if on_batch is not None:
+            on_batch(chunks)
+
+    truncated = next(windows, None) is not None
+    # an earlier run with more windows (other languages or settings) left these behind
+    delete_transcript_chunks(video_id, chunks)
+    fused = engine.result()
+    payload = {
+        "video_id": video_id,
+        "chunks": chunks,
+        "words": words,
+        "duration": round(duration, 2),
+        "truncated": truncated,
+        "aggregate": fused["aggregate"],
+        "review": fused["review"],
+        "aspect_list": fused["aspect_list"],
+    }
+    set_transcript_analysis(video_id, {
+        **_settings(absa, languages),
+        "payload": payload,
+        "created_at": datetime.utcnow(),
+    })
+    log_event("transcript.analyzed", video_id=video_id, chunks=chunks, words=words,
+              truncated=truncated, seconds=round(time.perf_counter() - started, 3))
+    return {**payload, "cached": False}